@@ -0,0 +1,194 @@
+"""Benchmarks for triangle, pyramid and sequence generation and for the triangle aggregations.
+
+Each case is timed over several repeats and run once more under `tracemalloc` to record its peak memory.
+Results are written as JSON, and a previous run can be given as a baseline to flag regressions:
+
+    python -m benchmarks.run --output baseline.json
+    python -m benchmarks.run --compare baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from time import perf_counter
+from typing import Callable, NamedTuple
+import numpy as np
+
+from triforce import pyramids, sequences, triangles
+from triforce.pyramid import Pyramid
+from triforce.triangle import Triangle
+
+
+class Case(NamedTuple):
+    """A benchmark: `run` is timed on the state returned by `setup`, which is not timed."""
+    group: str
+    name: str
+    n: int
+    setup: Callable[[], object]
+    run: Callable[[object], object]
+
+    @property
+    def key(self) -> str:
+        """Identify the case across runs."""
+        return f"{self.group}/{self.name}[n={self.n}]"
+
+
+TRIANGLE_SIZES = (100, 200, 400)
+PYRAMID_SIZES = (20, 40, 80)
+SEQUENCE_SIZES = (1000, 2000, 4000)
+AGGREGATION_SIZES = (100, 200, 400)
+
+# Sequence functions returning a single term, benchmarked by computing terms 0 to n - 1
+TERM_FUNCTIONS = ("fibonacci", "tribonacci", "lucas", "pell", "pell_lucas", "catalan",
+                  "lower_wythoff", "upper_wythoff", "compound_wythoff")
+# Sequence functions returning the first n terms
+PREFIX_FUNCTIONS = ("catalan_prefix", "triangular", "tetrahedral")
+
+AGGREGATIONS = {
+    "row_sums": lambda triangle: triangle.row_sums(),
+    "column_sums": lambda triangle: triangle.column_sums(),
+    "row_differences": lambda triangle: triangle.row_differences(),
+    "cumulative_row_sums": lambda triangle: triangle.cumulative_row_sums(),
+    "diagonal_sums": lambda triangle: triangle.diagonal_sums("left"),
+    "rising_diagonal_sums": lambda triangle: triangle.rising_diagonal_sums(),
+    "parity_pattern": lambda triangle: triangle.parity_pattern(),
+    "mod_triangle": lambda triangle: triangle.mod_triangle(7),
+    "center": lambda triangle: triangle.center(),
+    "hexagonal_centers": lambda triangle: triangle.hexagonal_centers(),
+    "is_symmetric": lambda triangle: triangle.is_symmetric(),
+    "flatten": lambda triangle: triangle.flatten(),
+}
+
+
+def _subclasses(module, base: type) -> list[type]:
+    """Return the subclasses of `base` defined in a module, in name order."""
+    return sorted(
+        (obj for obj in vars(module).values() if isinstance(obj, type) and issubclass(obj, base) and obj is not base),
+        key=lambda cls: cls.__name__,
+    )
+
+
+def _clear_sequence_caches() -> None:
+    """Empty the shared sequence caches so that sequence benchmarks measure generation."""
+    for cache in (sequences.FIBONACCI_CACHE, sequences.LUCAS_CACHE, sequences.PELL_CACHE,
+                  sequences.PELL_LUCAS_CACHE, sequences.TRIBONACCI_CACHE):
+        cache.clear()
+
+
+def cases(scale: float = 1.0) -> list[Case]:
+    """Build every benchmark case, with sizes multiplied by `scale`."""
+    def sizes(base):
+        return [max(1, round(n * scale)) for n in base]
+
+    result = []
+    for cls in _subclasses(triangles, Triangle):
+        for n in sizes(TRIANGLE_SIZES):
+            result.append(Case("triangles", cls.__name__, n, _clear_sequence_caches, lambda _, cls=cls, n=n: cls(n)))
+    for cls in _subclasses(pyramids, Pyramid):
+        for n in sizes(PYRAMID_SIZES):
+            result.append(Case("pyramids", cls.__name__, n, _clear_sequence_caches, lambda _, cls=cls, n=n: cls(n)))
+    for name in TERM_FUNCTIONS:
+        function = getattr(sequences, name)
+        for n in sizes(SEQUENCE_SIZES):
+            result.append(Case("sequences", name, n, _clear_sequence_caches,
+                               lambda _, function=function, n=n: [function(i) for i in range(n)]))
+    for name in PREFIX_FUNCTIONS:
+        function = getattr(sequences, name)
+        for n in sizes(SEQUENCE_SIZES):
+            result.append(Case("sequences", name, n, _clear_sequence_caches,
+                               lambda _, function=function, n=n: function(n)))
+    for name, aggregate in AGGREGATIONS.items():
+        for n in sizes(AGGREGATION_SIZES):
+            result.append(Case("aggregations", name, n, lambda n=n: triangles.PascalTriangle(n), aggregate))
+    return result
+
+
+def measure(case: Case, repeat: int = 3) -> dict:
+    """Time a case over `repeat` runs, keeping the fastest, and record its peak traced memory in one more run."""
+    times = []
+    for _ in range(repeat):
+        state = case.setup()
+        start = perf_counter()
+        case.run(state)
+        times.append(perf_counter() - start)
+
+    state = case.setup()
+    tracemalloc.start()
+    try:
+        case.run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"key": case.key, "group": case.group, "name": case.name, "n": case.n,
+            "seconds": min(times), "peak_bytes": peak}
+
+
+def compare(
+    results: list[dict],
+    baseline: list[dict],
+    threshold: float = 0.25,
+    min_seconds: float = 1e-3,
+) -> list[str]:
+    """Describe every case that is slower or uses more memory than in the baseline by more than `threshold`.
+
+    Cases that took under `min_seconds` in the baseline are only checked for memory, as their timings are noise.
+    """
+    previous = {result["key"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result["key"])
+        if before is None:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if metric == "seconds" and before[metric] < min_seconds:
+                continue
+            if before[metric] > 0 and result[metric] > before[metric] * (1 + threshold):
+                regressions.append(f"{result['key']}: {metric} rose from {before[metric]:.6g} to {result[metric]:.6g} "
+                                   f"({result[metric] / before[metric] - 1:+.0%})")
+    return regressions
+
+
+def main(argv: list[str] = None) -> int:
+    """Run the benchmarks from the command line, returning 1 if a comparison found regressions."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="Write the results as JSON to this file instead of standard output.")
+    parser.add_argument("--compare", help="A JSON file of earlier results to check for regressions against.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative slowdown counted as a regression.")
+    parser.add_argument("--min-seconds", type=float, default=1e-3,
+                        help="Baseline time below which timings are not compared.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs per case.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier applied to every problem size.")
+    parser.add_argument("--filter", default="", help="Only run cases whose key contains this text.")
+    args = parser.parse_args(argv)
+
+    results = []
+    for case in cases(args.scale):
+        if args.filter in case.key:
+            results.append(measure(case, args.repeat))
+            print(f"{case.key}: {results[-1]['seconds']:.6f}s, {results[-1]['peak_bytes']} bytes", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file)["results"], args.threshold, args.min_seconds)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
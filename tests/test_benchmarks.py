@@ -0,0 +1,21 @@
+"""Tests for the benchmark harness."""
+from benchmarks.run import Case, cases, compare, measure
+
+
+def test_measure_and_compare():
+    """Tests that measurements are recorded and regressions detected against a baseline."""
+    result = measure(Case("sequences", "squares", 100, lambda: None, lambda _: [i * i for i in range(100)]), repeat=2)
+    assert result["key"] == "sequences/squares[n=100]"
+    assert result["seconds"] > 0 and result["peak_bytes"] > 0
+
+    baseline = [dict(result, seconds=0.5, peak_bytes=1000)]
+    assert not compare([dict(result, seconds=0.6, peak_bytes=1000)], baseline)
+    regressions = compare([dict(result, seconds=0.7, peak_bytes=2000)], baseline)
+    assert len(regressions) == 2 and "seconds" in regressions[0] and "peak_bytes" in regressions[1]
+
+
+def test_cases_cover_every_class():
+    """Tests that every triangle, pyramid and sequence function has a benchmark case."""
+    names = {case.name for case in cases(scale=0.1)}
+    assert {"PascalTriangle", "CatalanTriangle", "WythoffTriangle", "PascalPyramid", "HosoyaPyramid"} <= names
+    assert {"fibonacci", "catalan_prefix", "tetrahedral", "row_sums", "center"} <= names
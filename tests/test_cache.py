@@ -0,0 +1,49 @@
+"""Tests for the generation cache."""
+import pytest
+
+from triforce.cache import GenerationCache, cached_triangle
+from triforce.triangles import BellTriangle, CatalanTriangle, PascalTriangle
+
+
+def test_slicing_and_extension():
+    """Tests that smaller requests are sliced from the cache and larger ones extend it."""
+    cache = GenerationCache()
+    assert cache.get(PascalTriangle, 10).triangle == PascalTriangle(10).triangle
+    assert cache.get(PascalTriangle, 4).triangle == PascalTriangle(4).triangle
+    assert cache.get(PascalTriangle, 10).n == 10
+    assert cache.info()[:3] == (2, 1, 0)
+
+    assert cache.get(CatalanTriangle, 12).triangle == CatalanTriangle(12).triangle
+    assert cache.get(CatalanTriangle, 5).triangle == CatalanTriangle(5).triangle
+
+    packed = cache.get(BellTriangle, 8, storage="packed")
+    assert [list(row) for row in packed] == BellTriangle(8).triangle
+    with pytest.raises(ValueError):
+        packed.flatten()[0] = 2
+
+    # Callers cannot change the cached rows
+    cache.get(PascalTriangle, 10)[3][1] = 999
+    assert cache.get(PascalTriangle, 10)[3] == [1, 3, 3, 1]
+    with pytest.raises(ValueError):
+        cache.get(PascalTriangle, 6, modulus=3)[2][1] = 0
+    assert [list(row) for row in cache.get(BellTriangle, 20, storage="packed")] == BellTriangle(20).triangle
+    modular = cache.get(PascalTriangle, 6, modulus=3)
+    assert [list(row) for row in modular] == [[value % 3 for value in row] for row in PascalTriangle(6)]
+    assert len(cache) == 4
+    with pytest.raises(ValueError):
+        cache.get(PascalTriangle, 5, storage="lazy")
+
+
+def test_eviction():
+    """Tests that the least recently used triangles are evicted to stay within the budget."""
+    cache = GenerationCache(max_bytes=30000)
+    cache.get(PascalTriangle, 30)
+    cache.get(BellTriangle, 30)
+    info = cache.info()
+    assert info.evictions == 1 and info.entries == 1 and info.bytes <= info.max_bytes
+    cache.get(PascalTriangle, 30)
+    assert cache.info().misses == 3
+
+    cache.clear()
+    assert cache.info()[:5] == (0, 0, 0, 0, 0)
+    assert cached_triangle(PascalTriangle, 7).row_sums() == [2**i for i in range(7)]
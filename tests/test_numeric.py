@@ -0,0 +1,33 @@
+"""Tests for numeric properties."""
+import numpy as np
+
+from triforce.numeric import PrimeSieve, is_prime, is_prime_many, miller_rabin
+
+
+def _trial_division(num: int) -> bool:
+    """Check primality by trial division."""
+    return num >= 2 and all(num % i for i in range(2, int(num**0.5) + 1))
+
+
+def test_prime_sieve():
+    """Tests the segmented sieve against trial division."""
+    sieve = PrimeSieve(1000, segment_size=64)
+    assert [sieve.is_prime(i) for i in range(-5, 2000)] == [_trial_division(i) for i in range(-5, 2000)]
+    assert [is_prime(i) for i in range(2000)] == [_trial_division(i) for i in range(2000)]
+
+
+def test_miller_rabin():
+    """Tests Miller-Rabin on Mersenne primes, Carmichael numbers and large composites."""
+    assert miller_rabin(2**61 - 1)
+    assert miller_rabin(2**89 - 1)
+    assert not miller_rabin(561)
+    assert not miller_rabin((2**61 - 1) * (2**89 - 1))
+    assert not miller_rabin(3215031751)
+
+
+def test_is_prime_many():
+    """Tests batch primality on arrays and mixed-size integers."""
+    values = np.arange(-3, 5000)
+    assert (is_prime_many(values) == [_trial_division(int(v)) for v in values]).all()
+    assert is_prime_many([2**89 - 1, 91, 97, 2**64]).tolist() == [True, False, True, False]
+    assert is_prime_many(np.array([[2, 4], [5, 9]]), limit=3).tolist() == [[True, False], [True, False]]
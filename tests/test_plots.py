@@ -0,0 +1,44 @@
+"""Tests for plotting helpers."""
+import numpy as np
+
+from triforce.numeric import divisible_by, is_even, is_odd, is_prime
+from triforce.plots import highlight_grid, highlight_image
+from triforce.triangles import BellTriangle, PascalTriangle
+
+
+def _expected_grid(triangle, filter_function) -> np.ndarray:
+    """Build the highlight grid one entry at a time."""
+    grid = np.zeros((triangle.n, triangle.n), dtype=bool)
+    for i in range(triangle.n):
+        for j in range(i + 1):
+            grid[i, j] = filter_function(triangle[i][j])
+    return grid
+
+
+def test_highlight_grid():
+    """Tests the vectorized, packed and Pascal parity highlight paths against per-entry filtering."""
+    bell = BellTriangle(70)
+    expected = _expected_grid(bell, divisible_by(3))
+    assert (highlight_grid(bell, divisible_by(3)) == expected).all()
+    assert (highlight_grid(bell, divisible_by(3), vectorized=True) == expected).all()
+    assert (highlight_grid(bell, divisible_by(3), packed=True) == np.packbits(expected, axis=1)).all()
+
+    assert (highlight_grid(bell, is_prime) == _expected_grid(bell, is_prime)).all()
+
+    pascal = PascalTriangle(70)
+    for filter_function in (is_even, is_odd):
+        assert (highlight_grid(pascal, filter_function) == _expected_grid(pascal, filter_function)).all()
+
+    # Replaced rows are filtered as stored
+    pascal[5] = [2, 3, 2, 3, 2, 3]
+    assert (highlight_grid(pascal, is_even) == _expected_grid(pascal, is_even)).all()
+
+
+def test_highlight_image():
+    """Tests that the downsampled image holds the fraction of highlighted entries per pixel."""
+    triangle = PascalTriangle(64, storage="lazy")
+    image = highlight_image(triangle, is_odd, resolution=8)
+    grid = _expected_grid(PascalTriangle(64), is_odd)
+    cells = np.tri(64).reshape((8, 8, 8, 8)).sum(axis=(1, 3))
+    hits = grid.reshape((8, 8, 8, 8)).sum(axis=(1, 3))
+    assert np.allclose(image, np.divide(hits, cells, out=np.zeros((8, 8)), where=cells > 0))
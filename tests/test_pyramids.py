@@ -0,0 +1,82 @@
+"""Tests for pyramid implementations."""
+from math import comb
+from io import StringIO
+import numpy as np
+
+from triforce.numeric import trinomial
+from triforce.pyramids import HosoyaPyramid, PascalPyramid
+from triforce.sequences import fibonacci
+
+
+def test_pascal_pyramid():
+    """Tests Pascal's Pyramid against the trinomial coefficients."""
+    pyramid = PascalPyramid(12)
+    expected = [[[trinomial(n, i, j) for j in range(n - i + 1)] for i in range(n + 1)] for n in range(12)]
+    assert pyramid.pyramid == expected
+    assert pyramid.next_layer(11, None) == expected[11]
+    assert pyramid.layer_sums() == [3**n for n in range(12)]
+
+
+def test_pascal_pyramid_modular():
+    """Tests modular generation of Pascal's Pyramid."""
+    expected = PascalPyramid(15).pyramid
+    for modulus in (2, 3, 100, 2**40):
+        pyramid = PascalPyramid(15, modulus=modulus)
+        assert [[list(row) for row in layer] for layer in pyramid] == \
+            [[[value % modulus for value in row] for row in layer] for layer in expected]
+        for storage in ("list", "packed"):
+            pyramid = PascalPyramid(15, modulus=modulus, storage=storage)
+            assert pyramid.layer_sums() == [
+                sum(value % modulus for row in layer for value in row) for layer in expected
+            ]
+
+
+def test_hosoya_pyramid():
+    """Tests Hosoya's Pyramid against products of Fibonacci numbers."""
+    pyramid = HosoyaPyramid(8)
+    expected = [[[fibonacci(i + 1) * fibonacci(j + 1) * fibonacci(k + 1) for k in range(i - j + 1)]
+                 for j in range(i + 1)] for i in range(8)]
+    assert pyramid.pyramid == expected
+
+
+def test_parallel_generation():
+    """Tests that parallel generation reassembles layers in order."""
+    assert PascalPyramid(20, workers=2).pyramid == PascalPyramid(20).pyramid
+    assert HosoyaPyramid(12, workers=2).pyramid == HosoyaPyramid(12).pyramid
+
+
+def test_packed_pyramid():
+    """Tests packed pyramid storage, layer views and cross-sections."""
+    expected = PascalPyramid(10)
+    pyramid = PascalPyramid(10, storage="packed")
+    assert pyramid[4] == expected[4]
+    assert pyramid.flatten().tolist() == expected.flatten()
+    assert pyramid.layer_sums() == expected.layer_sums()
+    assert np.shares_memory(pyramid.pyramid.layer_array(3), pyramid.flatten())
+
+    # Every plane of the trinomial coefficients is a scaled Pascal triangle
+    for axis in ("i", "j", "k"):
+        for index in (0, 3):
+            plane = [[comb(index + t, index) * comb(t, c) for c in range(t + 1)] for t in range(10 - index)]
+            assert [list(row) for row in pyramid.cross_section(axis, index)] == plane
+            assert [list(row) for row in expected.cross_section(axis, index)] == plane
+    assert HosoyaPyramid(6, storage="packed").layer_sums() == HosoyaPyramid(6).layer_sums()
+    assert PascalPyramid(30, modulus=5, storage="packed").pyramid.values.dtype == np.uint8
+
+
+def test_extend():
+    """Tests that extending a pyramid matches generating it with the final number of layers."""
+    for storage in ("list", "packed"):
+        pyramid = PascalPyramid(2, storage=storage)
+        pyramid.extend(7)
+        assert pyramid.n == 7
+        assert [[list(row) for row in layer] for layer in pyramid] == PascalPyramid(7).pyramid
+        assert pyramid.layer_sums() == [3**n for n in range(7)]
+
+
+def test_write_pyramid():
+    """Tests that the formatted pyramid is the same for both storage backends."""
+    buffer = StringIO()
+    PascalPyramid(4, storage="packed").write_pyramid(buffer)
+    assert buffer.getvalue() == str(PascalPyramid(4))
+    assert str(PascalPyramid(2)) == "Layer 0:\n1\n\nLayer 1:\n  1\n1   1\n\n"
@@ -0,0 +1,97 @@
+"""Tests for series arithmetic and Riordan arrays."""
+from math import comb
+import pytest
+
+from triforce.riordan import (
+    RiordanTriangle,
+    series_compose,
+    series_inverse,
+    series_multiply,
+    series_reversion,
+)
+from triforce.sequences import catalan
+from triforce.storage import LazyRows
+from triforce.triangles import PascalTriangle
+
+
+def test_series_arithmetic():
+    """Tests series products in both the int64 and big-integer regimes, inverses and reversion."""
+    a = [3, -1, 4, 1, -5]
+    b = [2, 7, -1, 8]
+    expected = [sum(a[i] * b[k - i] for i in range(k + 1) if i < len(a) and k - i < len(b)) for k in range(6)]
+    assert series_multiply(a, b, 6) == expected
+    assert series_multiply([c * 10**30 for c in a], b, 6) == [c * 10**30 for c in expected]
+    assert series_multiply(a, b, 6, modulus=7) == [c % 7 for c in expected]
+
+    geometric = series_inverse([1, -1], 8)
+    assert geometric == [1] * 8
+    assert series_compose([1, 1, 1, 1], [0, 2], 4) == [1, 2, 4, 8]
+    # x + x^2 is inverted by the generating function of the signed Catalan numbers
+    assert series_reversion([0, 1, 1], 8) == [0] + [(-1) ** k * catalan(k) for k in range(7)]
+    with pytest.raises(ValueError):
+        series_inverse([2, 1], 4)
+
+
+def test_riordan_triangles():
+    """Tests Pascal's triangle as a Riordan array, with its products and inverse."""
+    n = 25
+    pascal = RiordanTriangle(g=[1] * n, f=[0] + [1] * (n - 1))
+    assert pascal.triangle == PascalTriangle(n).triangle
+    assert pascal.inverse().triangle == [[(-1) ** (i - j) * comb(i, j) for j in range(i + 1)] for i in range(n)]
+    assert (pascal @ pascal).triangle == [[2 ** (i - j) * comb(i, j) for j in range(i + 1)] for i in range(n)]
+    assert (pascal @ pascal.inverse()).triangle == [[int(i == j) for j in range(i + 1)] for i in range(n)]
+
+    catalan_numbers = [catalan(i) for i in range(n)]
+    ballot = RiordanTriangle(g=catalan_numbers, f=[0] + catalan_numbers[:-1])
+    assert [row[0] for row in ballot] == catalan_numbers
+    assert ballot[4] == [14, 14, 9, 4, 1]
+
+    modular = RiordanTriangle(g=[1] * n, f=[0] + [1] * (n - 1), modulus=5)
+    assert [list(row) for row in modular] == [[value % 5 for value in row] for row in PascalTriangle(n)]
+
+
+def test_riordan_row_recurrence():
+    """Tests rows generated from the A-sequence against the columns of g f^k."""
+    n = 30
+    catalan_numbers = [catalan(i) for i in range(n)]
+    cases = [
+        ([1] * n, [0] + [1] * (n - 1)),  # Sparse A-sequence 1 + x
+        (catalan_numbers, [0] + catalan_numbers[:-1]),  # Dense A-sequence 1 / (1 - x)
+        ([2] + [3] * (n - 1), [0, -1] + [5] * (n - 2)),
+        ([1] * n, [0, 2, 1] + [0] * (n - 3)),  # f'(0) = 2 falls back to columns
+    ]
+    for g, f in cases:
+        # Column k has the generating function g f^k
+        columns = [series_multiply(g, _power(f, k, n), n) for k in range(n)]
+        expected = [[columns[k][i] for k in range(i + 1)] for i in range(n)]
+        assert RiordanTriangle(g=g, f=f).triangle == expected
+        assert [list(row) for row in RiordanTriangle(g=g, f=f, storage="packed")] == expected
+        for modulus in (4, 7, 2**61 - 1):
+            modular = RiordanTriangle(g=g, f=f, modulus=modulus)
+            assert [list(row) for row in modular] == [[value % modulus for value in row] for row in expected]
+        if f[1] in (1, -1):
+            lazy = RiordanTriangle(g=g, f=f, storage="lazy", cache_size=2)
+            assert isinstance(lazy.triangle, LazyRows)
+            assert lazy[n - 1] == expected[n - 1] and list(lazy.iter_rows()) == expected
+            extended = RiordanTriangle(5, g=g, f=f, modulus=7, storage="packed")
+            extended.extend(n)
+            assert [list(row) for row in extended] == [[value % 7 for value in row] for row in expected]
+
+    plain = RiordanTriangle(g=[1] * n, f=[0] + [1] * (n - 1))
+    modular = RiordanTriangle(g=[1] * n, f=[0] + [1] * (n - 1), modulus=5)
+    for product in (plain @ modular, modular @ plain):
+        assert product.modulus == 5
+        assert [list(row) for row in product] == [[2 ** (i - j) * comb(i, j) % 5 for j in range(i + 1)]
+                                                  for i in range(n)]
+    with pytest.raises(ValueError):
+        _ = modular @ RiordanTriangle(g=[1] * n, f=[0] + [1] * (n - 1), modulus=7)
+    with pytest.raises(ValueError):
+        _ = plain @ RiordanTriangle(g=[1] * 5, f=[0] + [1] * 4)
+
+
+def _power(f: list[int], k: int, n: int) -> list[int]:
+    """Return the first n coefficients of f^k."""
+    power = [1] + [0] * (n - 1)
+    for _ in range(k):
+        power = series_multiply(power, f, n)
+    return power
@@ -0,0 +1,33 @@
+"""Tests for triangles defined by edge and parent rules."""
+from triforce.rules import RuleTriangle, rule_triangle
+from triforce.sequences import LinearRecurrence, lucas
+from triforce.triangles import FibonacciPascalTriangle, LucasPascalTriangle, PascalTriangle
+
+
+class ShiftedFibonacciPascal(RuleTriangle):
+    """Fibonacci-Pascal triangle with the edges F(i + 1) given as a recurrence."""
+    left_edge = LinearRecurrence([1, 1], [1, 1])
+
+
+def test_rule_triangles_match_existing_triangles():
+    """Tests that rules reproduce the Pascal, Fibonacci-Pascal and Lucas-Pascal triangles."""
+    assert RuleTriangle(40).triangle == PascalTriangle(40).triangle
+    assert ShiftedFibonacciPascal(40).triangle == FibonacciPascalTriangle(40).triangle
+    assert rule_triangle("LucasPascal", lambda i: lucas(i + 1))(40).triangle == LucasPascalTriangle(40).triangle
+
+
+def test_weighted_rule():
+    """Tests an asymmetric rule with weights against a direct computation."""
+    weighted = rule_triangle("Weighted", lambda i: 1, lambda i: 2**i, left_weight=2, right_weight=-3)
+    expected = [[1]]
+    for i in range(1, 70):
+        above = expected[-1]
+        expected.append([1] + [2 * above[j - 1] - 3 * above[j] for j in range(1, i)] + [2**i])
+    assert weighted(70).triangle == expected
+    assert weighted.__name__ == "Weighted"
+
+    for modulus in (2, 10, 2**61 + 1):
+        reduced = [[value % modulus for value in row] for row in expected]
+        assert [list(row) for row in weighted(70, modulus=modulus)] == reduced
+        assert [list(row) for row in weighted(70, modulus=modulus, storage="lazy").iter_rows()] == reduced
+    assert [list(row) for row in weighted(70, storage="packed")] == expected
@@ -0,0 +1,60 @@
+"""Tests for integer sequences."""
+import pytest
+
+from triforce.sequences import (
+    FIBONACCI_CACHE,
+    LinearRecurrence,
+    SequenceCache,
+    catalan,
+    catalan_prefix,
+    fibonacci,
+    lucas,
+    pell,
+    pell_lucas,
+    tribonacci,
+)
+
+
+def _iterate(coefficients: list[int], initial: list[int], n: int) -> list[int]:
+    """Compute the first n terms of a linear recurrence by direct iteration."""
+    terms = list(initial)
+    while len(terms) < n:
+        terms.append(sum(c * a for c, a in zip(coefficients, reversed(terms[-len(coefficients):]))))
+    return terms[:n]
+
+
+def test_sequences_match_iteration():
+    """Tests the fast sequence implementations against direct iteration."""
+    assert [fibonacci(i) for i in range(60)] == _iterate([1, 1], [0, 1], 60)
+    assert [lucas(i) for i in range(60)] == _iterate([1, 1], [2, 1], 60)
+    assert [pell(i) for i in range(60)] == _iterate([2, 1], [0, 1], 60)
+    assert [pell_lucas(i) for i in range(60)] == _iterate([2, 1], [2, 2], 60)
+    assert [tribonacci(i) for i in range(60)] == _iterate([1, 1, 1], [0, 0, 1], 60)
+
+
+def test_linear_recurrence():
+    """Tests a user-defined linear recurrence at small and large indices."""
+    padovan = LinearRecurrence([0, 1, 1], [1, 1, 1])
+    assert [padovan(i) for i in range(40)] == _iterate([0, 1, 1], [1, 1, 1], 40)
+    assert LinearRecurrence([1, 1], [0, 1])(1000) == fibonacci(1000)
+    with pytest.raises(ValueError):
+        LinearRecurrence([1, 1], [0])
+
+
+def test_sequence_cache():
+    """Tests the bounded sequence cache and its bulk prefix API."""
+    cache = SequenceCache(LinearRecurrence([2, 1], [0, 1]), maxsize=16, lru_size=4)
+    assert cache.prefix(10) == [pell(i) for i in range(10)]
+    assert [cache(i) for i in range(30)] == [pell(i) for i in range(30)]
+    assert cache.prefix(30) == [pell(i) for i in range(30)]
+    assert FIBONACCI_CACHE.prefix(8) == [0, 1, 1, 2, 3, 5, 8, 13]
+
+
+def test_catalan():
+    """Tests Catalan numbers against their convolution recurrence."""
+    terms = [1]
+    for n in range(1, 30):
+        terms.append(sum(terms[i] * terms[n - 1 - i] for i in range(n)))
+    assert [catalan(n) for n in range(30)] == terms
+    assert catalan_prefix(30) == terms
+    assert not catalan_prefix(0)
@@ -0,0 +1,49 @@
+"""Tests for the on-disk triangle store."""
+import pytest
+
+from triforce.rules import rule_triangle
+from triforce.store import MappedRows, load_triangle, save_triangle
+from triforce.storage import PackedRows
+from triforce.triangle import Triangle
+from triforce.triangles import BellTriangle, PascalTriangle
+
+
+def test_fixed_width_round_trip(tmp_path):
+    """Tests that triangles of small entries are mapped back as packed rows."""
+    path = tmp_path / "pascal.tri"
+    save_triangle(PascalTriangle(40), path)
+    triangle = load_triangle(path)
+    assert isinstance(triangle, PascalTriangle)
+    assert isinstance(triangle.triangle, PackedRows)
+    assert [list(row) for row in triangle] == PascalTriangle(40).triangle
+    assert triangle.row_sums() == [2**i for i in range(40)]
+
+    save_triangle(PascalTriangle(30, modulus=7), path)
+    triangle = load_triangle(path)
+    assert triangle.modulus == 7 and triangle.triangle.values.itemsize == 1
+    assert [list(row) for row in triangle] == [[value % 7 for value in row] for row in PascalTriangle(30)]
+    # Aggregations widen the narrow mapped entries
+    save_triangle(PascalTriangle(100, modulus=7), path)
+    triangle = load_triangle(path)
+    reference = Triangle(triangle=[[value % 7 for value in row] for row in PascalTriangle(100)])
+    assert triangle.column_sums() == reference.column_sums()
+    assert triangle.row_sums() == reference.row_sums()
+    assert triangle.row_differences() == reference.row_differences()
+
+
+def test_limb_round_trip(tmp_path):
+    """Tests that triangles with entries beyond int64 are stored with limbs and decoded lazily."""
+    path = tmp_path / "bell.tri"
+    save_triangle(BellTriangle(50, storage="lazy"), path)
+    triangle = load_triangle(path)
+    assert isinstance(triangle, BellTriangle)
+    assert isinstance(triangle.triangle, MappedRows)
+    assert triangle[49] == BellTriangle(50)[49]
+    assert triangle.row_sums() == BellTriangle(50).row_sums()
+
+
+def test_unimportable_class_is_rejected(tmp_path):
+    """Tests that triangles whose class cannot be found by name are not saved."""
+    with pytest.raises(ValueError):
+        save_triangle(rule_triangle("Doubled", lambda i: 2)(5), tmp_path / "doubled.tri")
+    assert not (tmp_path / "doubled.tri").exists()
@@ -1,4 +1,7 @@
 """Tests for triangle implementations."""
+from math import comb
+import pytest
+
 from triforce.triangles import (
     BellTriangle,
     CatalanTriangle,
@@ -9,6 +12,8 @@ from triforce.triangles import (
     LucasPascalTriangle,
     WythoffTriangle
 )
+from triforce.sequences import catalan_prefix
+from triforce.triangle import Triangle
 
 
 def test_bell_triangle():
@@ -111,3 +116,306 @@ def test_wythoff_triangle():
         [12, 15, 16, 18, 8]
     ]
     assert wythoff_triangle.triangle == expected
+
+
+def test_lazy_storage_matches_list_storage():
+    """Tests that lazily generated rows match the eagerly generated triangle."""
+    for triangle_type in (BellTriangle, CatalanTriangle, FloydsTriangle, HosoyaTriangle,
+                          PascalTriangle, FibonacciPascalTriangle, LucasPascalTriangle, WythoffTriangle):
+        eager = triangle_type(12)
+        lazy = triangle_type(12, storage="lazy", cache_size=3)
+        assert [lazy[i] for i in range(12)] == eager.triangle
+        assert lazy.row_sums() == eager.row_sums()
+        assert lazy.diagonal(2, "left") == eager.diagonal(2, "left")
+        assert lazy.rising_diagonal(11) == eager.rising_diagonal(11)
+        assert str(lazy) == str(eager)
+
+
+def test_lazy_storage_bounds_cache():
+    """Tests that lazy storage only keeps a bounded window of rows."""
+    triangle = BellTriangle(200, storage="lazy", cache_size=4)
+    assert triangle[150] == BellTriangle(151)[150]
+    assert triangle[-1][0] == triangle[199][0]
+    assert len(triangle.triangle._cache) == 4  # pylint: disable=protected-access
+
+
+def test_entry_matches_rows():
+    """Tests that closed-form entries agree with the generated rows."""
+    for triangle_type in (BellTriangle, CatalanTriangle, FloydsTriangle, HosoyaTriangle,
+                          PascalTriangle, FibonacciPascalTriangle, LucasPascalTriangle, WythoffTriangle):
+        triangle = triangle_type(10)
+        assert [[triangle.entry(i, j) for j in range(i + 1)] for i in range(10)] == triangle.triangle
+
+
+def test_entry_sparse_extraction():
+    """Tests that closed-form triangles extract entries without generating rows."""
+    triangle = PascalTriangle(10**6, storage="lazy")
+    assert triangle.entry(10**6 - 1, 2) == (10**6 - 1) * (10**6 - 2) // 2
+    assert triangle.diagonal(999_990, "right")[:3] == [1, 999_991, 999_991 * 999_992 // 2]
+    assert CatalanTriangle(9, storage="lazy").center() == [1, 2, 9, 48, 275]
+
+
+def test_entry_reads_supplied_rows():
+    """Tests that closed forms are not used for supplied or replaced rows."""
+    rows = [[i + 1] * (i + 1) for i in range(8)]
+    for triangle_type in (CatalanTriangle, FloydsTriangle, HosoyaTriangle, PascalTriangle, WythoffTriangle):
+        triangle = triangle_type(triangle=rows)
+        assert triangle.entry(5, 2) == 6
+        assert triangle.center() == [1, 3, 5, 7]
+        assert triangle.diagonal(2, "left") == [3, 4, 5, 6, 7, 8]
+        assert triangle.hexagonal_centers() == [[3], [5, 5], [7, 7, 7]]
+
+    pascal = PascalTriangle(8)
+    pascal[4] = [7] * 5
+    assert pascal.rising_diagonal(4) == [7, 3, 1]
+    assert sum(pascal.rising_diagonal(4)) == pascal.rising_diagonal_sums()[4]
+    assert pascal.parity_pattern()[4] == [1] * 5
+
+
+def test_catalan_triangle_diagonal_is_catalan():
+    """Tests that the Catalan Triangle's main diagonal holds the Catalan numbers."""
+    assert CatalanTriangle(300, storage="lazy").diagonal(0, "left") == catalan_prefix(300)
+
+
+def test_packed_storage_matches_list_storage():
+    """Tests that vectorized aggregations on packed storage match the list backend."""
+    for n in (1, 12, 80):
+        for triangle_type in (BellTriangle, CatalanTriangle, FloydsTriangle, HosoyaTriangle,
+                              PascalTriangle, FibonacciPascalTriangle, LucasPascalTriangle, WythoffTriangle):
+            eager = triangle_type(n)
+            packed = triangle_type(n, storage="packed")
+            assert list(packed.triangle) == eager.triangle
+            assert packed.row_sums() == eager.row_sums()
+            assert packed.column_sums() == eager.column_sums()
+            assert packed.row_differences() == eager.row_differences()
+            assert packed.parity_pattern() == eager.parity_pattern()
+            assert packed.mod_triangle(7) == eager.mod_triangle(7)
+            assert packed.diagonal_sums("left") == eager.diagonal_sums("left")
+            assert packed.diagonal_sums("right") == eager.diagonal_sums("right")
+
+
+def test_modular_generation_matches_reduced_triangle():
+    """Tests that modular generation matches reducing the big-integer triangle."""
+    for triangle_type in (BellTriangle, PascalTriangle, FibonacciPascalTriangle, LucasPascalTriangle):
+        eager = triangle_type(40)
+        for modulus in (2, 7, 1000, 2**40):
+            for storage in ("list", "lazy", "packed"):
+                modular = triangle_type(40, storage=storage, modulus=modulus)
+                assert [list(row) for row in modular.triangle] == eager.mod_triangle(modulus)
+                # Aggregations of fixed-width residues must not overflow
+                reference = Triangle(triangle=eager.mod_triangle(modulus))
+                assert modular.row_sums() == reference.row_sums()
+                assert modular.cumulative_row_sums() == reference.cumulative_row_sums()
+                assert modular.column_sums() == reference.column_sums()
+                assert modular.row_differences() == reference.row_differences()
+                assert modular.range_sum(0, 40, 0, 40) == reference.range_sum(0, 40, 0, 40)
+                assert modular.diagonal_sums("left") == reference.diagonal_sums("left")
+                assert modular.diagonal_sums("right") == reference.diagonal_sums("right")
+                assert modular.rising_diagonal_sums() == reference.rising_diagonal_sums()
+
+
+def test_modular_generation_requires_support():
+    """Tests that triangles without a modular recurrence reject a modulus."""
+    with pytest.raises(ValueError):
+        CatalanTriangle(5, modulus=3)
+    with pytest.raises(ValueError):
+        PascalTriangle(5, modulus=0)
+
+
+def test_pascal_divisibility():
+    """Tests Kummer's theorem divisibility queries against the binomial coefficients."""
+    triangle = PascalTriangle(40, storage="lazy")
+    for p in (2, 3, 5, 7):
+        block = triangle.divisibility_block(10, 40, p)
+        for i in range(10, 40):
+            for j in range(40):
+                expected = j <= i and comb(i, j) % p == 0
+                assert block[i - 10, j] == expected
+                if j <= i:
+                    assert triangle.is_divisible(i, j, p) == expected
+    assert PascalTriangle(1100, storage="lazy").parity_pattern() == PascalTriangle(1100).mod_triangle(2)
+    odd = ~triangle.divisibility_block(0, 40, 2)
+    assert [mask.tolist() for mask in triangle.iter_odd_masks()] == [odd[i, :i + 1].tolist() for i in range(40)]
+    for p in (0, 1):
+        with pytest.raises(ValueError):
+            triangle.is_divisible(5, 2, p)
+        with pytest.raises(ValueError):
+            triangle.divisibility_block(0, 5, p)
+    with pytest.raises(IndexError):
+        triangle.divisibility_block(30, 41, 2)
+    with pytest.raises(IndexError):
+        triangle.divisibility_block(-1, 5, 2)
+
+
+def test_parallel_generation():
+    """Tests that parallel generation reassembles rows in order."""
+    for triangle_type in (CatalanTriangle, FloydsTriangle, HosoyaTriangle, PascalTriangle, WythoffTriangle):
+        assert triangle_type(40, workers=2).triangle == triangle_type(40).triangle
+    assert list(PascalTriangle(40, storage="packed", workers=2).triangle) == PascalTriangle(40).triangle
+    with pytest.raises(ValueError):
+        BellTriangle(10, workers=2)
+
+
+def test_streaming_aggregations():
+    """Tests that streaming aggregations over lazy rows match the list backend."""
+    for triangle_type in (BellTriangle, HosoyaTriangle, PascalTriangle, LucasPascalTriangle):
+        eager = triangle_type(30)
+        lazy = triangle_type(30, storage="lazy", cache_size=1)
+        assert list(lazy.iter_rows(5, 9)) == eager.triangle[5:9]
+        assert list(lazy.iter_row_sums()) == eager.row_sums()
+        assert list(lazy.iter_cumulative_row_sums()) == [sum(eager.row_sums()[:i + 1]) for i in range(30)]
+        assert list(lazy.iter_center()) == eager.center()
+        assert list(lazy.iter_parity_pattern()) == eager.mod_triangle(2)
+        assert lazy.column_sums() == eager.column_sums()
+
+
+def test_prefix_sum_queries():
+    """Tests range and diagonal segment sums against direct summation."""
+    triangle = BellTriangle(12)
+    assert triangle.range_sum(3, 9, 2, 5) == sum(triangle[i][j] for i in range(3, 9) for j in range(2, min(5, i + 1)))
+    assert triangle.diagonal_segment_sum(2, 1, 6, "left") == sum(triangle.diagonal(2, "left")[1:6])
+    assert triangle.diagonal_segment_sum(3, 2, None, "right") == sum(triangle.diagonal(3, "right")[2:])
+    assert triangle.diagonal_segment_sum(10, 1, 4, "rising") == sum(triangle.rising_diagonal(10)[1:4])
+    lazy = BellTriangle(12, storage="lazy")
+    assert triangle.diagonal_sums("left") == lazy.diagonal_sums("left")
+    assert triangle.diagonal_sums("right") == lazy.diagonal_sums("right")
+    assert triangle.rising_diagonal_sums() == lazy.rising_diagonal_sums()
+
+    # Whole-diagonal sums are recomputed from the rows, even after in-place edits
+    triangle.range_sum(0, 12, 0, 12)
+    triangle[2][1] = 100
+    assert triangle.diagonal_sums("left")[1] == sum(triangle.diagonal(1, "left"))
+    assert triangle.rising_diagonal_sums()[3] == sum(triangle.rising_diagonal(3))
+    triangle.invalidate_prefix_sums()
+    assert triangle.range_sum(2, 3, 0, 3) == triangle.row_sums()[2]
+
+    triangle[5] = [0] * 6
+    assert triangle.row_sums()[5] == triangle.range_sum(5, 6, 0, 6) == 0
+
+
+def test_packed_row_views():
+    """Tests zero-copy row views and flat-array construction of packed triangles."""
+    packed = PascalTriangle(6, storage="packed")
+    assert packed[4] == [1, 4, 6, 4, 1]
+    assert packed[4][2] == 6 and packed[4][-1] == 1
+    assert packed.entry(5, 2) == 10
+    assert packed.is_symmetric()
+
+    flat = packed.flatten()
+    flat[0] = 7
+    assert packed[0][0] == 7
+
+    copy = Triangle(triangle=PascalTriangle(6).to_packed().values.copy())
+    assert copy.n == 6 and copy.storage == "packed"
+    assert list(copy.triangle) == PascalTriangle(6).triangle
+    assert copy.row_sums() == [2**i for i in range(6)]
+
+
+def test_extend():
+    """Tests that extending a triangle matches generating it with the final number of rows."""
+    for storage in ("list", "lazy", "packed"):
+        for cls in (BellTriangle, FibonacciPascalTriangle, FloydsTriangle, PascalTriangle):
+            triangle = cls(3, storage=storage)
+            assert triangle.row_sums() == cls(3).row_sums()
+            for m in (4, 9, 2):
+                triangle.extend(m)
+            assert triangle.n == 9
+            assert [list(row) for row in triangle.iter_rows()] == cls(9).triangle
+            assert triangle.row_sums() == cls(9).row_sums()
+
+    # Rows built through `entry` are checked against the extended number of rows
+    class EntryRows(Triangle):
+        """Floyd's triangle built one entry at a time."""
+        closed_form_rows = True
+
+        def next_row(self, i, previous):
+            return [self.entry(i, j) for j in range(i + 1)]
+
+        def entry(self, i, j):
+            self._check_entry_index(i, j)
+            return i * (i + 1) // 2 + j + 1
+
+    for storage in ("list", "lazy", "packed"):
+        triangle = EntryRows(3, storage=storage)
+        triangle.extend(8)
+        assert [list(row) for row in triangle.iter_rows()] == FloydsTriangle(8).triangle
+
+    modular = LucasPascalTriangle(5, modulus=7, storage="packed")
+    modular.extend(20)
+    assert [list(row) for row in modular] == [[value % 7 for value in row] for row in LucasPascalTriangle(20)]
+    with pytest.raises(ValueError):
+        Triangle(triangle=[[1]]).extend(2)
+
+
+def test_write_triangle():
+    """Tests that streaming the formatted triangle in chunks matches formatting it whole."""
+    triangle = PascalTriangle(10)
+    chunks = []
+
+    class Recorder:  # pylint: disable=too-few-public-methods
+        """Collects each write."""
+        def write(self, text):
+            """Record a chunk."""
+            chunks.append(text)
+
+    triangle.write_triangle(Recorder(), chunk_rows=4)
+    assert len(chunks) == 3
+    assert "".join(chunks) == str(triangle) == str(PascalTriangle(10, storage="packed"))
+    assert str(triangle).splitlines()[-1] == " 1     9    36    84    126   126   84    36     9     1 "
+
+
+def test_matrix_operations():
+    """Tests products, powers, inverses and matrix-vector products of triangles as lower-triangular matrices."""
+    n = 30
+    pascal = PascalTriangle(n)
+    identity = [[int(i == j) for j in range(i + 1)] for i in range(n)]
+    assert (pascal ** 2).triangle == [[2 ** (i - j) * comb(i, j) for j in range(i + 1)] for i in range(n)]
+    assert (pascal ** -1).triangle == pascal.inverse().triangle
+    assert pascal.inverse().triangle == [[(-1) ** (i - j) * comb(i, j) for j in range(i + 1)] for i in range(n)]
+    assert (pascal.inverse() @ pascal).triangle == identity
+    assert (pascal ** 0).triangle == identity
+
+    bell = BellTriangle(n)
+    expected = [[sum(comb(i, k) * bell[k][j] for k in range(j, i + 1)) for j in range(i + 1)] for i in range(n)]
+    assert (pascal @ bell).triangle == expected
+    assert [list(row) for row in PascalTriangle(n, modulus=101) @ bell] == \
+        [[value % 101 for value in row] for row in expected]
+    assert [list(row) for row in PascalTriangle(n, modulus=2**61 - 1) ** -3] == \
+        [[(-3) ** (i - j) * comb(i, j) % (2**61 - 1) for j in range(i + 1)] for i in range(n)]
+
+    assert pascal.apply([1] * n) == [2**i for i in range(n)]
+    assert pascal @ ([10**30] * n) == [2**i * 10**30 for i in range(n)]
+    with pytest.raises(ValueError):
+        bell.inverse()
+    with pytest.raises(ValueError):
+        _ = PascalTriangle(5) @ PascalTriangle(3)
+
+
+def test_ratio_lines():
+    """Tests that lines extracted by ratio recurrences match the entries of generated triangles."""
+    n = 30
+    for cls in (PascalTriangle, CatalanTriangle, HosoyaTriangle):
+        triangle = cls(n)
+        reference = Triangle(triangle=[list(row) for row in triangle])
+        assert triangle.center() == reference.center()
+        assert triangle.hexagonal_centers() == reference.hexagonal_centers()
+        assert triangle.rising_diagonal_sums() == reference.rising_diagonal_sums()
+        for d in range(n + 1):
+            assert triangle.diagonal(d, "left") == reference.diagonal(d, "left")
+            assert triangle.diagonal(d, "right") == reference.diagonal(d, "right")
+        assert triangle.line(25, 3, -3, 1, 6) == [reference[25 - 3 * k][3 + k] for k in range(6)]
+        with pytest.raises(IndexError):
+            triangle.line(25, 3, 1, 1, 6)
+
+    assert PascalTriangle(n, modulus=7).center() == [comb(2 * k, k) % 7 for k in range((n + 1) // 2)]
+    assert CatalanTriangle(n).triangle == [
+        [(i - j + 1) * comb(i + j, j) // (i + 1) for j in range(i + 1)] for i in range(n)
+    ]
+
+    # Lines at huge indices are computed without generating the triangle
+    big = 10**4 + 1
+    assert PascalTriangle(big, storage="lazy").center()[-1] == comb(big - 1, big // 2)
+    catalan = CatalanTriangle(big, storage="lazy")
+    assert catalan.diagonal(2, "right")[-1] == catalan.entry(big - 1, 2)
+    hosoya = HosoyaTriangle(big, storage="lazy")
+    assert hosoya.rising_diagonal(big - 1)[-1] == hosoya.entry(big // 2, big // 2)
@@ -0,0 +1,175 @@
+"""Process-wide cache of generated triangles."""
+import sys
+from collections import OrderedDict
+from threading import Lock
+from typing import NamedTuple
+import numpy as np
+
+from triforce.storage import PackedRows
+from triforce.triangle import Triangle
+
+
+class CacheInfo(NamedTuple):
+    """Counters describing the state of a `GenerationCache`."""
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    max_bytes: int
+
+
+def estimate_bytes(rows) -> int:
+    """Estimate the memory held by the rows of a triangle from a sample of evenly spaced rows."""
+    if isinstance(rows, PackedRows):
+        values = rows.values
+        if values.dtype != object:
+            return values.nbytes
+        sample = values[np.linspace(0, len(values) - 1, num=min(len(values), 64), dtype=np.int64)]
+        return values.nbytes + len(values) * sum(sys.getsizeof(value) for value in sample) // max(len(sample), 1)
+    n = len(rows)
+    if n == 0:
+        return 0
+    total = 0
+    sample = sorted({round(k * (n - 1) / 15) for k in range(16)})
+    for i in sample:
+        row = rows[i]
+        if isinstance(row, np.ndarray) and row.dtype != object:
+            total += sys.getsizeof(row)
+        else:
+            total += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+    return total * n // len(sample)
+
+
+class GenerationCache:
+    """Thread-safe LRU cache of generated triangles with a budget in bytes, shared by every caller.
+
+    Triangles are keyed on their class and options other than n, and only the largest generated n is kept per
+    key. A request for n rows is answered by slicing the cached rows when at least n are cached, and otherwise by
+    extending a copy of the cached rows through `Triangle.extend` when the class has a row recurrence.
+
+    Callers cannot change the cached rows. Triangles returned for list storage get their own copies of the row
+    lists, and NumPy rows and packed arrays are shared through read-only views, so writing to them, e.g.
+    through `Triangle.flatten`, raises.
+    """
+    def __init__(self, max_bytes: int = 2**28):
+        """Initialize the cache.
+
+        Args:
+            max_bytes (int): The estimated memory the cached rows may use before the least recently used are evicted.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, cls: type, n: int, modulus: int = None, storage: str = "list", workers: int = None) -> Triangle:
+        """Return the triangle `cls(n, modulus=modulus, storage=storage, workers=workers)`, generating it at most once.
+
+        Args:
+            cls (type): The Triangle subclass to generate.
+            n (int): The number of rows.
+            modulus (int): If given, entries are generated modulo this number.
+            storage (str): Either 'list' or 'packed'. Lazy triangles are already bounded in memory and not cached.
+            workers (int): The number of processes used on a miss. It does not change the result, so it is not
+                part of the key.
+        """
+        if storage not in ("list", "packed"):
+            raise ValueError("Only list and packed triangles can be cached.")
+        key = (cls, modulus, storage)
+        with self._lock:
+            entry = self._entries.get(key)
+            cached = None if entry is None else entry[0]
+            if cached is not None:
+                self._entries.move_to_end(key)
+                if cached.n >= n:
+                    self.hits += 1
+                    return self._slice(cached, n)
+            self.misses += 1
+
+        if cached is not None and cached._has_row_recurrence():  # pylint: disable=protected-access
+            triangle = self._slice(cached, cached.n, copy=True)
+            triangle.extend(n)
+        else:
+            triangle = cls(n, modulus=modulus, storage=storage, workers=workers)
+        self._store(key, triangle)
+        return self._slice(triangle, n)
+
+    @staticmethod
+    def _slice(triangle: Triangle, n: int, copy: bool = False) -> Triangle:
+        """Return a new triangle holding the first n rows of a cached one.
+
+        Row lists are always copied, which costs one reference per entry. Arrays are copied if `copy` is set and
+        shared through read-only views otherwise.
+        """
+        rows = triangle.triangle
+        if isinstance(rows, PackedRows):
+            values = rows.values[:n * (n + 1) // 2]
+            if copy:
+                values = values.copy()
+            else:
+                values = values.view()
+                values.flags.writeable = False
+            rows = PackedRows(values, n)
+        else:
+            rows = [GenerationCache._copy_row(row, copy) for row in rows[:n]]
+        sliced = type(triangle)(triangle=rows, modulus=triangle.modulus)
+        # The rows were generated by the class, so its closed forms still apply
+        sliced._own_rows = triangle._own_rows  # pylint: disable=protected-access
+        return sliced
+
+    @staticmethod
+    def _copy_row(row: list[int] | np.ndarray, copy: bool) -> list[int] | np.ndarray:
+        """Return a copy of a row list, or a copy or read-only view of a NumPy row."""
+        if not isinstance(row, np.ndarray):
+            return list(row)
+        if copy:
+            return row.copy()
+        row = row.view()
+        row.flags.writeable = False
+        return row
+
+    def _store(self, key: tuple, triangle: Triangle) -> None:
+        """Cache a triangle unless it exceeds the budget or a larger one is cached, then evict down to the budget."""
+        size = estimate_bytes(triangle.triangle)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is not None:
+                if previous[0].n >= triangle.n:
+                    return
+                self._bytes -= previous[1]
+                del self._entries[key]
+            self._entries[key] = (triangle, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def info(self) -> CacheInfo:
+        """Return the hit, miss and eviction counts and the current and maximum size."""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, len(self._entries), self._bytes, self.max_bytes)
+
+    def clear(self) -> None:
+        """Empty the cache and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+
+GENERATION_CACHE = GenerationCache()
+
+
+def cached_triangle(cls: type, n: int, **options) -> Triangle:
+    """Return `cls(n, **options)` from the process-wide generation cache."""
+    return GENERATION_CACHE.get(cls, n, **options)
@@ -0,0 +1,126 @@
+"""Exact lower-triangular matrix kernels for triangles viewed as matrices.
+
+Matrices are dense n x n NumPy arrays that are zero above the diagonal. They are int64 while no product or sum
+can overflow and object arrays of Python integers otherwise, so every result is exact. With a modulus, entries
+are residues and products are reduced block by block, which keeps the fast int64 path for moduli up to about
+2^28.
+"""
+from typing import Iterable
+import numpy as np
+
+from triforce.storage import INT64_BOUND
+
+
+BLOCK_SIZE = 64
+
+
+def to_matrix(rows: Iterable[list[int]], n: int, modulus: int = None) -> np.ndarray:
+    """Return the first n rows of a triangle as a dense lower-triangular matrix, reduced modulo `modulus`."""
+    matrix = np.zeros((n, n), dtype=np.int64)
+    for i, row in enumerate(rows):
+        if i == n:
+            break
+        row = [int(value) for value in row[:i + 1]]
+        if modulus is not None:
+            row = [value % modulus for value in row]
+        if matrix.dtype != object and (max(row) >= INT64_BOUND or min(row) <= -INT64_BOUND):
+            matrix = matrix.astype(object)
+        matrix[i, :i + 1] = row
+    return matrix
+
+
+def _largest(matrix: np.ndarray) -> int:
+    """Return the largest absolute value of an entry."""
+    return int(np.abs(matrix).max()) if matrix.size else 0
+
+
+def _product_dtype(a: np.ndarray, b: np.ndarray, terms: int) -> type:
+    """Return int64 if sums of `terms` products of entries of a and b cannot overflow it, and object otherwise."""
+    if a.dtype == object or b.dtype == object or terms * _largest(a) * _largest(b) >= INT64_BOUND:
+        return object
+    return np.int64
+
+
+def lower_matmul(a: np.ndarray, b: np.ndarray, modulus: int = None, block: int = BLOCK_SIZE) -> np.ndarray:
+    """Multiply two lower-triangular matrices, skipping the blocks above the diagonal.
+
+    Block (I, J) of the product is the sum of A_IK B_KJ over J <= K <= I, a sixth of the work of a dense product.
+    """
+    n = len(a)
+    if modulus is None:
+        dtype = _product_dtype(a, b, n)
+    else:
+        # Each block product is reduced before the blocks are summed
+        dtype = np.int64 if block * (modulus - 1) ** 2 < 2**63 and -(-n // block) * modulus < 2**63 else object
+    a, b = a.astype(dtype, copy=False), b.astype(dtype, copy=False)
+    product = np.zeros((n, n), dtype=dtype)
+    starts = range(0, n, block)
+    for i in starts:
+        rows = slice(i, i + block)
+        for j in starts:
+            if j > i:
+                break
+            total = product[rows, j:j + block]
+            for k in range(j, i + 1, block):
+                partial = np.dot(a[rows, k:k + block], b[k:k + block, j:j + block])
+                total += partial if modulus is None else partial % modulus
+            if modulus is not None:
+                total %= modulus
+    return product
+
+
+def lower_inverse(matrix: np.ndarray, modulus: int = None) -> np.ndarray:
+    """Invert a lower-triangular matrix by forward substitution, one row at a time.
+
+    Row i of the inverse X is given by X[i, i] = 1 / L[i, i] and X[i, :i] = -X[i, i] (L[i, :i] X[:i, :i]), so only
+    the lower triangle of X is ever computed. Over the integers, the diagonal must consist of 1 and -1. With a
+    modulus, it must consist of units.
+    """
+    n = len(matrix)
+    diagonal = [int(value) for value in np.diagonal(matrix)]
+    if modulus is None:
+        if any(value not in (1, -1) for value in diagonal):
+            raise ValueError("Only triangles with 1 or -1 on the diagonal are invertible over the integers.")
+        pivots = diagonal
+        dtype = np.int64 if matrix.dtype != object else object
+    else:
+        try:
+            pivots = [pow(value, -1, modulus) for value in diagonal]
+        except ValueError as error:
+            raise ValueError("The diagonal entries must be invertible modulo the modulus.") from error
+        dtype = np.int64 if n * (modulus - 1) ** 2 < 2**63 else object
+    matrix = matrix.astype(dtype, copy=False)
+    inverse = np.zeros((n, n), dtype=dtype)
+    largest = 1
+    for i in range(n):
+        inverse[i, i] = pivots[i]
+        if i == 0:
+            continue
+        if modulus is None and inverse.dtype != object and i * _largest(matrix[i, :i]) * largest >= INT64_BOUND:
+            matrix, inverse = matrix.astype(object), inverse.astype(object)
+        row = np.dot(matrix[i, :i], inverse[:i, :i])
+        if modulus is None:
+            row = -pivots[i] * row
+        else:
+            row = (row % modulus) * (modulus - pivots[i]) % modulus
+        inverse[i, :i] = row
+        if modulus is None and inverse.dtype != object:
+            largest = max(largest, _largest(row))
+    return inverse
+
+
+def lower_matvec(rows: Iterable[list[int]], vector: list[int], modulus: int = None) -> list[int]:
+    """Multiply the lower-triangular matrix with the given rows by a vector, streaming the rows."""
+    vector = [int(value) for value in vector]
+    largest = max(map(abs, vector), default=0)
+    result = []
+    for row in rows:
+        if len(result) == len(vector):
+            break
+        row = [int(value) for value in row[:len(vector)]]
+        if len(row) * max(map(abs, row), default=0) * largest < INT64_BOUND:
+            total = int(np.dot(np.array(row, dtype=np.int64), np.array(vector[:len(row)], dtype=np.int64)))
+        else:
+            total = sum(x * y for x, y in zip(row, vector))
+        result.append(total if modulus is None else total % modulus)
+    return result
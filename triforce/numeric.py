@@ -1,16 +1,127 @@
 """Numeric properties."""
+from functools import lru_cache
+from math import comb, isqrt
+from typing import Callable, Iterable
+import numpy as np
 
 
-def is_prime(num: int) -> bool:
-    """Check if a number is prime."""
+# Default bound below which primality is answered from the sieve.
+SIEVE_LIMIT = 2**20
+
+# Miller-Rabin with these bases is deterministic for every n < 3.3 * 10^24.
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def miller_rabin(num: int) -> bool:
+    """Check if a number is prime with the Miller-Rabin test.
+
+    The test is deterministic below 3.3 * 10^24 and a strong probable-prime test above it.
+    """
     if num < 2:
         return False
-    for i in range(2, int(num**0.5) + 1):
-        if num % i == 0:
+    for p in MILLER_RABIN_BASES:
+        if num % p == 0:
+            return num == p
+    # Write num - 1 = d * 2^s with d odd
+    d, s = num - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in MILLER_RABIN_BASES:
+        x = pow(a, d, num)
+        if x in (1, num - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % num
+            if x == num - 1:
+                break
+        else:
             return False
     return True
 
 
+class PrimeSieve:
+    """Bitset of the primes below a bound built by a segmented sieve of Eratosthenes.
+
+    Numbers at or above the bound are tested with `miller_rabin`.
+    """
+    def __init__(self, limit: int = SIEVE_LIMIT, segment_size: int = 2**16):
+        """Sieve the numbers below `limit`, `segment_size` numbers at a time."""
+        self.limit = limit
+        self.segment_size = max(8, segment_size - segment_size % 8)  # Segments pack into whole bytes
+        self.bits = self._sieve()
+
+    def _sieve(self) -> np.ndarray:
+        """Return the primality of 0, ..., limit - 1 packed into bits."""
+        root = isqrt(max(self.limit - 1, 0))
+        base = np.ones(root + 1, dtype=bool)
+        base[:2] = False
+        for p in range(2, isqrt(root) + 1):
+            if base[p]:
+                base[p * p::p] = False
+        primes = np.flatnonzero(base).tolist()
+
+        segments = []
+        for low in range(0, self.limit, self.segment_size):
+            high = min(low + self.segment_size, self.limit)
+            segment = np.ones(high - low, dtype=bool)
+            for p in primes:
+                if p * p >= high:
+                    break
+                # Cross off multiples of p starting from the first one in the segment that is at least p^2
+                start = max(p * p, -(-low // p) * p)
+                segment[start - low::p] = False
+            if low == 0:
+                segment[:2] = False
+            segments.append(np.packbits(segment))
+        return np.concatenate(segments) if segments else np.zeros(0, dtype=np.uint8)
+
+    def _lookup(self, values: np.ndarray) -> np.ndarray:
+        """Read the primality of non-negative values below the limit from the bitset."""
+        return (self.bits[values >> 3] >> (7 - (values & 7))) & 1 == 1
+
+    def is_prime(self, num: int) -> bool:
+        """Check if a number is prime."""
+        if num < 2:
+            return False
+        if num < self.limit:
+            return bool(self._lookup(np.int64(num)))
+        return miller_rabin(num)
+
+    def is_prime_many(self, values: Iterable[int]) -> np.ndarray:
+        """Check every value for primality, returning a boolean array."""
+        values = values if isinstance(values, np.ndarray) else np.array(list(values))
+        result = np.zeros(values.shape, dtype=bool)
+        if values.size == 0:
+            return result
+        if values.dtype == object and -2**63 <= min(values.flat) and max(values.flat) < 2**63:
+            values = values.astype(np.int64)
+        if values.dtype.kind not in "iu":
+            return np.vectorize(self.is_prime, otypes=[bool])(values)
+
+        sieved = (values >= 0) & (values < self.limit)
+        result[sieved] = self._lookup(values[sieved].astype(np.int64))
+        for index in zip(*np.nonzero(values >= self.limit)):
+            result[index] = miller_rabin(int(values[index]))
+        return result
+
+
+@lru_cache(maxsize=4)
+def prime_sieve(limit: int = SIEVE_LIMIT) -> PrimeSieve:
+    """Return the shared prime sieve for the given bound, building it on first use."""
+    return PrimeSieve(limit)
+
+
+def is_prime(num: int) -> bool:
+    """Check if a number is prime."""
+    return prime_sieve().is_prime(num)
+
+
+def is_prime_many(values: Iterable[int], limit: int = SIEVE_LIMIT) -> np.ndarray:
+    """Check every value for primality at once, sieving below `limit`, returning a boolean array."""
+    return prime_sieve(limit).is_prime_many(values)
+
+
 def is_even(num: int) -> bool:
     """Check if number is even."""
     return num % 2 == 0
@@ -21,12 +132,29 @@ def is_odd(num: int) -> bool:
     return num % 2 != 0
 
 
+def divisible_by(k: int) -> Callable:
+    """Return a predicate checking divisibility by k, for a single integer or elementwise for an array."""
+    def predicate(num):
+        return num % k == 0
+    return predicate
+
+
 def trinomial(n: int, i: int, j: int) -> int:
     """Calculate the trinomial coefficient."""
     k = n - i - j
     if k < 0:
         return 0
-    return factorial(n) // (factorial(i) * factorial(j) * factorial(k))
+    return multinomial(i, j, k)
+
+
+def multinomial(*parts: int) -> int:
+    """Calculate the multinomial coefficient (k_1 + ... + k_m)! / (k_1! ... k_m!) as a product of binomials."""
+    result = 1
+    total = 0
+    for part in parts:
+        total += part
+        result *= comb(total, part)
+    return result
 
 
 def factorial(num: int) -> int:
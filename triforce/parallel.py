@@ -0,0 +1,49 @@
+"""Parallel generation of triangles and pyramids across a process pool."""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+
+def balanced_ranges(n: int, chunks: int, dimension: int) -> list[tuple[int, int]]:
+    """Split indices 0, ..., n - 1 into at most `chunks` ranges holding roughly equal numbers of entries.
+
+    Item i of a triangle (dimension 2) holds O(i) entries and of a pyramid (dimension 3) O(i^2), so the first
+    k items hold O(k^dimension) entries and the boundaries are spaced as n (c / chunks)^(1 / dimension).
+    """
+    bounds = sorted({round(n * (c / chunks) ** (1 / dimension)) for c in range(chunks + 1)})
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if start < stop]
+
+
+def generate_range(source, method: str, start: int, stop: int) -> list:
+    """Generate items start through stop - 1 with `source.<method>(i, previous)`.
+
+    The first item is generated without a previous item, so the method must support a closed form.
+    """
+    step = getattr(source, method)
+    items = []
+    previous = None
+    for i in range(start, stop):
+        previous = step(i, previous)
+        items.append(previous)
+    return items
+
+
+def parallel_generate(source, method: str, n: int, workers: int, dimension: int = 2) -> list:
+    """Generate items 0, ..., n - 1 of `source` across a process pool and reassemble them in order.
+
+    Args:
+        source: A picklable triangle or pyramid providing the generating method.
+        method (str): Name of the method mapping an index and the previous item (or None) to the item.
+        n (int): The number of items to generate.
+        workers (int): The number of worker processes.
+        dimension (int): 2 for the rows of a triangle or 3 for the layers of a pyramid, used to balance work.
+    """
+    ranges = balanced_ranges(n, 4 * workers, dimension)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = executor.map(
+            generate_range,
+            repeat(source),
+            repeat(method),
+            [start for start, _ in ranges],
+            [stop for _, stop in ranges],
+        )
+        return [item for chunk in chunks for item in chunk]
@@ -1,27 +1,125 @@
 """Plotting for triangles and pyramids."""
-from typing import Callable
+from typing import Callable, Iterator
 import matplotlib.pyplot as plt
 import numpy as np
 
 from triforce.triangle import Triangle
-from triforce.triangles import LucasPascalTriangle
-from triforce.numeric import is_even
+from triforce.triangles import LucasPascalTriangle, PascalTriangle
+from triforce.numeric import is_even, is_odd, is_prime, is_prime_many
 
 
-def highlight_plot(input_triangle: Triangle, filter_function: Callable):
-    """Plot the triangle, highlighting numbers that satisfy the filter function."""
+def highlight_rows(
+    input_triangle: Triangle,
+    filter_function: Callable,
+    vectorized: bool = False,
+) -> Iterator[np.ndarray]:
+    """Yield, for each row of the triangle, a boolean mask of the entries that satisfy the filter function.
+
+    Args:
+        input_triangle (Triangle): The triangle to filter.
+        filter_function (Callable): Predicate applied to each entry, or to each row as an array if vectorized.
+        vectorized (bool): Whether the filter function maps an array of entries to an array of booleans,
+            such as `is_even` or `divisible_by(k)`, instead of being called once per entry.
+    """
     n = input_triangle.n
-    grid = np.zeros((n, n), dtype=int)
+    if filter_function is is_prime:
+        # Answer primality for whole rows from the shared sieve
+        filter_function, vectorized = is_prime_many, True
+
+    if isinstance(input_triangle, PascalTriangle) and input_triangle.modulus is None and \
+            filter_function in (is_even, is_odd):
+        # Parity of binomial coefficients follows without computing them, unless the rows were replaced
+        for odd in input_triangle.iter_odd_masks():
+            yield odd if filter_function is is_odd else ~odd
+        return
+
     for i in range(n):
-        for j in range(i + 1):
-            if filter_function(input_triangle[i][j]):
-                grid[i, j] = 1
+        row = input_triangle[i]
+        if vectorized:
+            yield np.asarray(filter_function(np.asarray(row)), dtype=bool)
+        else:
+            yield np.fromiter((bool(filter_function(num)) for num in row), dtype=bool, count=len(row))
+
+
+def highlight_grid(
+    input_triangle: Triangle,
+    filter_function: Callable,
+    vectorized: bool = False,
+    packed: bool = False,
+) -> np.ndarray:
+    """Return the n x n boolean grid of entries that satisfy the filter function.
+
+    If packed, each row of the grid is packed into bits with `np.packbits`, using n^2 / 8 bytes in total.
+    """
+    n = input_triangle.n
+    grid = np.zeros((n, (n + 7) // 8 if packed else n), dtype=np.uint8 if packed else bool)
+    for i, mask in enumerate(highlight_rows(input_triangle, filter_function, vectorized)):
+        if packed:
+            grid[i, :(i + 8) // 8] = np.packbits(mask)
+        else:
+            grid[i, :i + 1] = mask
+    return grid
+
+
+def highlight_image(
+    input_triangle: Triangle,
+    filter_function: Callable,
+    resolution: int = 1024,
+    vectorized: bool = False,
+) -> np.ndarray:
+    """Downsample the highlighted triangle to a resolution x resolution image in bounded memory.
+
+    Rows are streamed one at a time and each pixel holds the fraction of the triangle's entries in it that
+    satisfy the filter function.
+    """
+    n = input_triangle.n
+    resolution = min(resolution, max(n, 1))
+    hits = np.zeros((resolution, resolution), dtype=np.int64)
+    cells = np.zeros((resolution, resolution), dtype=np.int64)
+    # Column j falls in pixel j * resolution // n, so pixel c covers columns bin_starts[c] to bin_ends[c] - 1
+    bin_starts = -(-np.arange(resolution) * n // resolution)
+    bin_ends = np.append(bin_starts[1:], n)
+    for i, mask in enumerate(highlight_rows(input_triangle, filter_function, vectorized)):
+        row_bin = i * resolution // n
+        used = np.searchsorted(bin_starts, i, side="right")
+        hits[row_bin, :used] += np.add.reduceat(mask, bin_starts[:used], dtype=np.int64)
+        cells[row_bin, :used] += np.minimum(bin_ends[:used], i + 1) - bin_starts[:used]
+    return np.divide(hits, cells, out=np.zeros(hits.shape), where=cells > 0)
+
+
+def highlight_plot(
+    input_triangle: Triangle,
+    filter_function: Callable,
+    vectorized: bool = False,
+    resolution: int = None,
+):
+    """Plot the triangle, highlighting numbers that satisfy the filter function.
+
+    If a resolution is given, the triangle is downsampled with `highlight_image` instead of drawing one pixel
+    per entry.
+    """
+    if resolution is None:
+        image = highlight_grid(input_triangle, filter_function, vectorized)
+    else:
+        image = highlight_image(input_triangle, filter_function, resolution, vectorized)
 
     plt.figure(figsize=(6, 6))
-    plt.imshow(grid, cmap="binary", interpolation="none")
+    plt.imshow(image, cmap="binary", interpolation="none")
     plt.axis("off")
     plt.show()
 
 
+def save_highlight_plot(
+    input_triangle: Triangle,
+    filter_function: Callable,
+    path: str,
+    resolution: int = 1024,
+    vectorized: bool = False,
+):
+    """Render the downsampled highlight image of the triangle to a PNG file."""
+    image = highlight_image(input_triangle, filter_function, resolution, vectorized)
+    plt.imsave(path, image, cmap="binary", vmin=0, vmax=1)
+
+
 if __name__ == "__main__":
-    highlight_plot(LucasPascalTriangle(n=510), is_even)
+    highlight_plot(LucasPascalTriangle(n=510), is_even, vectorized=True)
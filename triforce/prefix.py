@@ -0,0 +1,79 @@
+"""Prefix-sum index over the rows, columns and diagonals of a triangle."""
+from typing import Iterable
+
+
+class PrefixSums:
+    """Prefix sums of a triangle answering range-sum queries in O(1).
+
+    Three tables are built in one pass over the rows, each holding one prefix sum per entry:
+
+    - `block[i][j]` is the sum of the entries in rows 0, ..., i - 1 and columns 0, ..., j - 1, for j <= i.
+      Rows and columns (the right diagonals) are rectangles of width or height one.
+    - `left[d][t]` is the sum of the first t entries (d, 0), (d + 1, 1), ... of left diagonal d.
+    - `rising[r][t]` is the sum of the first t entries (r, 0), (r - 1, 1), ... of rising diagonal r.
+    """
+    def __init__(self, rows: Iterable[list[int]]):
+        """Build the index from the rows of a triangle, where row i holds i + 1 entries."""
+        self.block = [[0]]
+        self.left = []
+        rising = []
+        for i, row in enumerate(rows):
+            # Accumulate Python integers, since modular rows are narrow fixed-width arrays
+            row = [int(value) for value in row]
+            # Extend the block sums by row i, which adds nothing beyond column i + 1
+            above = self.block[-1]
+            running = 0
+            block = [0]
+            for j, value in enumerate(row):
+                running += value
+                block.append(above[min(j + 1, i)] + running)
+            self.block.append(block)
+
+            self.left.append([0])
+            rising.extend([] for _ in range(i + len(row) - len(rising)))
+            for j, value in enumerate(row):
+                self.left[i - j].append(self.left[i - j][-1] + value)
+                # Entry (i, j) is position j of rising diagonal i + j, reached in decreasing position order
+                rising[i + j].append(value)
+        self.n = len(self.left)
+        self.rising = []
+        for values in rising[:self.n]:
+            sums = [0]
+            for value in reversed(values):
+                sums.append(sums[-1] + value)
+            self.rising.append(sums)
+
+    def block_sum(self, i: int, j: int) -> int:
+        """Return the sum of the entries in rows 0, ..., i - 1 and columns 0, ..., j - 1."""
+        i = max(0, min(i, self.n))
+        return self.block[i][max(0, min(j, i))]
+
+    def range_sum(self, row_start: int, row_stop: int, col_start: int, col_stop: int) -> int:
+        """Return the sum of the entries in rows row_start to row_stop - 1 and columns col_start to col_stop - 1."""
+        return self.block_sum(row_stop, col_stop) - self.block_sum(row_start, col_stop) - \
+            self.block_sum(row_stop, col_start) + self.block_sum(row_start, col_start)
+
+    def diagonal_sum(self, diagonal_index: int, start: int = 0, stop: int = None, direction: str = "right") -> int:
+        """Return the sum of positions start to stop - 1 along a diagonal.
+
+        Args:
+            diagonal_index (int): The index of the diagonal, as in `Triangle.diagonal` and `Triangle.rising_diagonal`.
+            start (int): The first position along the diagonal.
+            stop (int): One past the last position along the diagonal, or None for its end.
+            direction (str): One of 'right', 'left' or 'rising'.
+        """
+        if direction == "right":
+            # Right diagonal d is column d, starting in row d
+            length = self.n - diagonal_index
+            stop = length if stop is None else min(stop, length)
+            start = min(start, stop)
+            return self.range_sum(diagonal_index + start, diagonal_index + stop, diagonal_index, diagonal_index + 1)
+        if direction == "left":
+            sums = self.left[diagonal_index]
+        elif direction == "rising":
+            sums = self.rising[diagonal_index]
+        else:
+            raise ValueError("Direction must be one of 'left', 'right' or 'rising'.")
+        stop = len(sums) - 1 if stop is None else min(stop, len(sums) - 1)
+        start = min(start, stop)
+        return sums[stop] - sums[start]
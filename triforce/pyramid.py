@@ -1,12 +1,48 @@
 """Primary Pyramid class."""
+from io import StringIO
+from typing import Iterator, TextIO
+import numpy as np
+
+from triforce.parallel import parallel_generate
+from triforce.storage import INT64_BOUND, PackedLayers, modular_dtype, python_row
+from triforce.triangle import Triangle
 
 
 class Pyramid:
     """Base Pyramid class."""
-    def __init__(self, n: int):
-        """Initialize the pyramid with n layers."""
+    # Whether `next_layer` can compute any layer without being given the previous one.
+    closed_form_layers = False
+    # Whether `next_layer` can generate layers modulo `self.modulus` as fixed-width NumPy arrays.
+    modular_layers = False
+
+    def __init__(self, n: int, *, modulus: int = None, workers: int = None, storage: str = "list"):
+        """Initialize the pyramid with n layers.
+
+        Args:
+            n (int): The number of layers to generate.
+            modulus (int): If given, every entry is generated modulo this number and rows are NumPy arrays.
+            workers (int): If greater than one, layers are generated in parallel by this many processes. Only
+                pyramids with closed-form layers support it.
+            storage (str): Either 'list' to hold nested lists, or 'packed' to hold every entry in one flat
+                array in tetrahedral order, with layers and rows read through zero-copy views.
+        """
+        if storage not in ("list", "packed"):
+            raise ValueError("Storage must be either 'list' or 'packed'.")
+        if modulus is not None:
+            if not self.modular_layers:
+                raise ValueError(f"{type(self).__name__} does not support modular generation.")
+            if not 1 <= modulus < INT64_BOUND:
+                raise ValueError("Modulus must be a positive integer below 2**62.")
+        if workers is not None and workers > 1 and not self.closed_form_layers:
+            raise ValueError(f"{type(self).__name__} does not support parallel generation.")
         self.n = n
-        self.pyramid = self.generate_pyramid()
+        self.modulus = modulus
+        self.workers = workers
+        self.storage = storage
+        if storage == "packed":
+            self.pyramid = PackedLayers.from_layers(self.generate_layers(), n)
+        else:
+            self.pyramid = self.generate_pyramid()
 
     def __len__(self):
         return len(self.pyramid)
@@ -18,32 +54,112 @@ class Pyramid:
         return self.format_pyramid()
 
     def generate_pyramid(self) -> list[list[list[int]]]:
-        """Generate the pyramid. This should be overridden by subclasses."""
+        """Generate the pyramid. Subclasses override either this method or `next_layer`."""
+        if self.workers is not None and self.workers > 1:
+            return parallel_generate(self, "next_layer", self.n, self.workers, dimension=3)
+        pyramid = []
+        layer = None
+        for i in range(self.n):
+            layer = self.next_layer(i, layer)
+            pyramid.append(layer)
+        return pyramid
+
+    def generate_layers(self) -> Iterator[list[list[int]]]:
+        """Yield the layers one at a time, keeping only the previous layer when following the recurrence."""
+        if type(self).generate_pyramid is not Pyramid.generate_pyramid or \
+                (self.workers is not None and self.workers > 1):
+            yield from self.generate_pyramid()
+            return
+        yield from self._layers_from(0, self.n, None)
+
+    def extend(self, m: int) -> None:
+        """Grow the pyramid to m layers, resuming the layer recurrence from its last layer."""
+        if type(self).next_layer is Pyramid.next_layer:
+            raise ValueError(f"{type(self).__name__} does not generate layers through `next_layer`.")
+        if m <= self.n:
+            return
+        previous = self.pyramid[self.n - 1] if self.n > 0 else None
+        if isinstance(self.pyramid, PackedLayers):
+            previous = [row.tolist() if self.modulus is None else row.array() for row in previous or []] or None
+            self.pyramid.extend(self._layers_from(self.n, m, previous), m)
+        else:
+            self.pyramid.extend(self._layers_from(self.n, m, previous))
+        self.n = m
+
+    def _layers_from(self, start: int, stop: int, previous: list[list[int]] | None) -> Iterator[list[list[int]]]:
+        """Yield layers start through stop - 1, given layer start - 1."""
+        for i in range(start, stop):
+            previous = self.next_layer(i, previous)
+            yield previous
+
+    def next_layer(self, i: int, previous: list[list[int]] | None) -> list[list[int]]:
+        """Generate layer i from the previous layer, which is None for the first layer or when not available."""
         raise NotImplementedError("Subclasses should implement this method to generate specific pyramids.")
 
-    def flatten(self) -> list[int]:
-        """Flatten the pyramid into a 1D list."""
+    def _modular_row(self, row: list[int], terms: int = 2) -> np.ndarray:
+        """Reduce a row of Python integers modulo `self.modulus` into a fixed-width array."""
+        return np.array([value % self.modulus for value in row], dtype=modular_dtype(self.modulus, terms))
+
+    def flatten(self) -> list[int] | np.ndarray:
+        """Flatten the pyramid into a 1D list, or a view of the flat array for packed storage."""
+        if isinstance(self.pyramid, PackedLayers):
+            return self.pyramid.values.view()
         return [item for layer in self.pyramid for row in layer for item in row]
 
     def layer_sums(self) -> list[int]:
         """Calculate the sum of each layer in the pyramid."""
-        return [sum(sum(row) for row in layer) for layer in self.pyramid]
+        if isinstance(self.pyramid, PackedLayers):
+            return self.pyramid.layer_sums()
+        return [sum(sum(python_row(row)) for row in layer) for layer in self.pyramid]
+
+    def cross_section(self, axis: str, index: int) -> Triangle:
+        """Return the plane of the pyramid where one coordinate is fixed, as a triangle.
+
+        Entry (r, c) of layer m has coordinates i = r, j = c and k = m - r - c. The plane where `axis` equals
+        `index` is a triangle of n - index rows, whose row t comes from layer index + t.
+
+        Args:
+            axis (str): One of 'i', 'j' or 'k'.
+            index (int): The value of the fixed coordinate.
+        """
+        if isinstance(self.pyramid, PackedLayers):
+            return Triangle(triangle=self.pyramid.cross_section(axis, index))
+        if not 0 <= index < self.n:
+            raise IndexError("Cross-section index out of range.")
+        layers = range(index, self.n)
+        if axis == "i":
+            rows = [list(self.pyramid[m][index]) for m in layers]
+        elif axis == "j":
+            rows = [[self.pyramid[m][r][index] for r in range(m - index + 1)] for m in layers]
+        elif axis == "k":
+            rows = [[self.pyramid[m][r][m - index - r] for r in range(m - index + 1)] for m in layers]
+        else:
+            raise ValueError("Axis must be one of 'i', 'j' or 'k'.")
+        return Triangle(triangle=rows)
 
     def format_pyramid(self):
         """Format the pyramid for display as upside-down triangles with correct spacing."""
-        ret = ""
+        buffer = StringIO()
+        self.write_pyramid(buffer)
+        return buffer.getvalue()
+
+    def write_pyramid(self, file: TextIO) -> None:
+        """Write the pyramid formatted as by `format_pyramid` to a file-like object, one layer at a time."""
         for n, layer in enumerate(self.pyramid):
-            ret += f"Layer {n}:\n"
-            max_width = len(str(max(max(row) for row in layer)))
+            lines = [f"Layer {n}:\n"]
+            if isinstance(self.pyramid, PackedLayers):
+                max_width = len(str(self.pyramid.layer_array(n).max()))
+            else:
+                max_width = len(str(max(max(row) for row in layer)))
             spacing = 3  # Adjust for readability
             last_row_width = len(layer[0]) * (max_width + spacing) - spacing  # Calculate width of the largest row
 
             # Reverse rows to print largest first and smallest last
-            for _, row in enumerate(reversed(layer)):
+            for row in reversed(layer):
                 formatted_nums = [f"{num:^{max_width}}" for num in row]
                 # Add padding for each row to keep the triangle shape upside down
                 left_padding = (last_row_width - len(row) * (max_width + spacing) + spacing) // 2
-                ret += " " * left_padding + (" " * spacing).join(formatted_nums) + "\n"
+                lines.append(" " * left_padding + (" " * spacing).join(formatted_nums) + "\n")
 
-            ret += "\n"
-        return ret
+            lines.append("\n")
+            file.write("".join(lines))
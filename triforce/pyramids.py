@@ -1,32 +1,62 @@
 """Implementations of Pyramids."""
+import numpy as np
+
 from triforce.pyramid import Pyramid
-from triforce.sequences import fibonacci
-from triforce.numeric import trinomial
+from triforce.sequences import FIBONACCI_CACHE
 
 
 class PascalPyramid(Pyramid):
     """Generates Pascal Pyramid."""
-    def generate_pyramid(self) -> list[list[list[int]]]:
-        """Generate Pascal's Pyramid up to n layers."""
-        pyramid = []
-        for n in range(self.n):
-            layer = []
-            for i in range(n + 1):
-                row = [trinomial(n, i, j) for j in range(n - i + 1)]
-                layer.append(row)
-            pyramid.append(layer)
-        return pyramid
+    closed_form_layers = True
+    modular_layers = True
+
+    def next_layer(self, i: int, previous: list[list[int]] | None) -> list[list[int]]:
+        """Generate layer i of Pascal's Pyramid, by adding three parents when layer i - 1 is available."""
+        if previous is None:
+            return self._closed_form_layer(i)
+
+        layer = []
+        for r in range(i + 1):
+            # Entry (r, c) is the sum of parents (r-1, c), (r, c-1) and (r, c) of the previous layer,
+            # where row r of the previous layer is missing for the last row and parents outside it are zero
+            if self.modulus is None:
+                above = previous[r] if r < i else []
+                row = [x + y for x, y in zip([0] + above, above + [0])]
+                if r > 0:
+                    row = [x + y for x, y in zip(row, previous[r - 1])]
+            else:
+                row = np.zeros(i - r + 1, dtype=previous[0].dtype)
+                if r < i:
+                    row[1:] += previous[r]
+                    row[:-1] += previous[r]
+                if r > 0:
+                    row += previous[r - 1]
+                row %= self.modulus
+            layer.append(row)
+        return layer
+
+    def _closed_form_layer(self, i: int) -> list[list[int]]:
+        """Generate layer i from the trinomial coefficients T(i; r, c) = C(i, r) C(i - r, c)."""
+        layer = []
+        outer = 1  # C(i, r)
+        for r in range(i + 1):
+            row = [outer]
+            for c in range(1, i - r + 1):
+                row.append(row[-1] * (i - r - c + 1) // c)
+            layer.append(row if self.modulus is None else self._modular_row(row, terms=3))
+            outer = outer * (i - r) // (r + 1)
+        return layer
 
 
 class HosoyaPyramid(Pyramid):
     """Generates Hosoya Pyramid."""
-    def generate_pyramid(self) -> list[list[list[int]]]:
-        """Generate Hosoya's Pyramid up to n layers."""
-        pyramid = []
-        for i in range(self.n):
-            layer = []
-            for j in range(i + 1):
-                row = [fibonacci(i + 1) * fibonacci(j + 1) * fibonacci(k + 1) for k in range(i - j + 1)]
-                layer.append(row)
-            pyramid.append(layer)
-        return pyramid
+    closed_form_layers = True
+
+    def next_layer(self, i: int, previous: list[list[int]] | None) -> list[list[int]]:
+        """Generate layer i of Hosoya's Pyramid."""
+        fib = FIBONACCI_CACHE.prefix(i + 2)
+        layer = []
+        for j in range(i + 1):
+            row = [fib[i + 1] * fib[j + 1] * fib[k + 1] for k in range(i - j + 1)]
+            layer.append(row)
+        return layer
@@ -0,0 +1,310 @@
+"""Riordan arrays: triangles built from a pair of power series by fast series arithmetic.
+
+Power series are lists of integer coefficients [a_0, a_1, ...], and every operation truncates its result to the
+first n coefficients. Products are computed exactly with `np.convolve` when no coefficient can overflow int64 and
+by Kronecker substitution otherwise, packing each series into one Python integer so that a single big-integer
+multiplication computes all coefficients at once.
+"""
+from math import gcd
+from operator import add
+import numpy as np
+
+from triforce.storage import INT64_BOUND, modular_dtype
+from triforce.triangle import Triangle
+
+
+# A-sequences with at most this many non-zero terms are applied term by term instead of by a series product
+SPARSE_TERMS = 8
+
+
+def _pack(coefficients: list[int], width: int) -> int:
+    """Evaluate a series at 2^(8 width), given that every coefficient fits in `width` signed bytes."""
+    positive = b"".join(max(c, 0).to_bytes(width, "little") for c in coefficients)
+    negative = b"".join(max(-c, 0).to_bytes(width, "little") for c in coefficients)
+    return int.from_bytes(positive, "little") - int.from_bytes(negative, "little")
+
+
+def _short_convolve(a: np.ndarray, b: np.ndarray, n: int) -> np.ndarray:
+    """Return the first min(n, len(a) + len(b) - 1) coefficients of the product of two int64 series.
+
+    `np.convolve` computes every coefficient of the product, so the upper half of b is only multiplied by the
+    part of a that reaches the first n coefficients. Recursing on that half skips about a third of the work.
+    """
+    if len(a) + len(b) - 1 <= n or min(len(a), len(b)) <= 64:
+        return np.convolve(a, b)[:n]
+    half = len(b) // 2
+    product = np.zeros(n, dtype=np.result_type(a, b))
+    low = np.convolve(a, b[:half])[:n]
+    product[:len(low)] = low
+    high = _short_convolve(a[:n - half], b[half:], n - half)
+    product[half:half + len(high)] += high
+    return product
+
+
+def series_multiply(a: list[int], b: list[int], n: int, modulus: int = None) -> list[int]:
+    """Return the first n coefficients of the product of two series, optionally modulo `modulus`."""
+    if modulus is not None:
+        a = [c % modulus for c in a[:n]]
+        b = [c % modulus for c in b[:n]]
+    a, b = a[:n], b[:n]
+    if not a or not b or n <= 0:
+        return [0] * max(n, 0)
+    count = min(n, len(a) + len(b) - 1)
+    largest_a, largest_b = max(map(abs, a)), max(map(abs, b))
+    bound = min(len(a), len(b)) * largest_a * largest_b
+    if bound == 0:
+        return [0] * n
+    if bound < INT64_BOUND:
+        product = _short_convolve(np.array(a, dtype=np.int64), np.array(b, dtype=np.int64), count).tolist()
+    else:
+        # Each coefficient of the product is below 2^(8 width - 1) in absolute value, so adding that to every
+        # coefficient makes them the non-negative base-2^(8 width) digits of the product
+        width = (bound.bit_length() + 8) // 8
+        half = 1 << (8 * width - 1)
+        bias = int.from_bytes((bytes(width - 1) + b"\x80") * count, "little")
+        digits = ((_pack(a, width) * _pack(b, width) + bias) & ((1 << (8 * width * count)) - 1))
+        data = digits.to_bytes(width * count, "little")
+        product = [int.from_bytes(data[i * width:(i + 1) * width], "little") - half for i in range(count)]
+    if modulus is not None:
+        product = [c % modulus for c in product]
+    return product + [0] * (n - count)
+
+
+def series_inverse(a: list[int], n: int, modulus: int = None) -> list[int]:
+    """Return the first n coefficients of 1 / a by Newton iteration, doubling the precision at each step.
+
+    The constant term must be 1 or -1, or invertible modulo `modulus`.
+    """
+    if modulus is None:
+        if a[0] not in (1, -1):
+            raise ValueError("The constant term must be 1 or -1 to invert a series over the integers.")
+        inverse = [a[0]]
+    else:
+        inverse = [pow(a[0], -1, modulus)]
+    precision = 1
+    while precision < n:
+        precision = min(2 * precision, n)
+        # b <- b (2 - a b)
+        error = [-c for c in series_multiply(a, inverse, precision, modulus)]
+        error[0] += 2
+        inverse = series_multiply(inverse, error, precision, modulus)
+    return inverse[:n]
+
+
+def series_compose(g: list[int], f: list[int], n: int, modulus: int = None) -> list[int]:
+    """Return the first n coefficients of g(f(x)) by Horner's rule, where f has no constant term."""
+    if f and f[0] != 0:
+        raise ValueError("The inner series must have no constant term.")
+    result = [0] * n
+    for coefficient in reversed(g[:n]):
+        result = series_multiply(result, f, n, modulus)
+        result[0] += coefficient
+        if modulus is not None:
+            result[0] %= modulus
+    return result
+
+
+def series_reversion(f: list[int], n: int, modulus: int = None) -> list[int]:
+    """Return the first n coefficients of the compositional inverse of f, such that f(r(x)) = x.
+
+    By Lagrange inversion, [x^k] r = (1/k) [x^(k-1)] (x / f(x))^k. The series f must have no constant term and a
+    linear term of 1 or -1. The coefficients are computed over the integers and reduced modulo `modulus` at the
+    end, since k need not be invertible.
+    """
+    if len(f) < 2 or f[0] != 0 or f[1] not in (1, -1):
+        raise ValueError("The series must have no constant term and a linear term of 1 or -1.")
+    quotient = series_inverse(f[1:n + 1], n)  # x / f(x)
+    reversion = [0] * n
+    power = [1]
+    for k in range(1, n):
+        power = series_multiply(power, quotient, n - 1)
+        reversion[k] = power[k - 1] // k
+    return reversion if modulus is None else [c % modulus for c in reversion]
+
+
+class RiordanTriangle(Triangle):  # pylint: disable=abstract-method
+    """Riordan array (g, f), the triangle whose column k has the generating function g(x) f(x)^k.
+
+    Here g has a non-zero constant term and f has no constant term and a non-zero linear term. For example,
+    Pascal's triangle is (1 / (1 - x), x / (1 - x)). Riordan arrays are closed under the matrix product and
+    inverse, which act on the series as (g, f)(h, l) = (g h(f), l(f)) and (g, f)^-1 = (1 / g(r), r), where r is
+    the compositional inverse of f.
+
+    Rows follow from the A-sequence of f, the series A with f = x A(f), as T(i, 0) = g_i and
+    T(i, j+1) = sum of a_k T(i-1, j+k) over k >= 0. The A-sequence is read off the triangle itself: column 1 is
+    g f, so each a_k follows from one row and one coefficient of g f, which is a single series product. A sparse
+    A-sequence, such as 1 + x for Pascal's triangle, costs O(i) per row, and a dense one a series product per
+    row. This needs f'(0) = 1 or -1 over the integers, and g(0) f'(0) invertible modulo the modulus; otherwise
+    the triangle is built column by column and cannot be generated lazily or extended.
+
+    The series are given to the constructor or by overriding `g_series` and `f_series` in a subclass.
+    """
+    modular_rows = True
+
+    def __init__(self, n: int = None, g: list[int] = None, f: list[int] = None, **options):
+        """Initialize the triangle with n rows of the Riordan array (g, f).
+
+        Args:
+            n (int): The number of rows. Defaults to the number of coefficients given for both series.
+            g (list[int]): Leading coefficients of g, unless `g_series` is overridden.
+            f (list[int]): Leading coefficients of f, unless `f_series` is overridden.
+            **options: Passed to `Triangle`, such as `storage` and `modulus`.
+        """
+        self._series = (g, f)
+        # Leading coefficients of g and g f, grown with the number of rows
+        self._left = self._column = None
+        # The A-sequence found so far, and its non-zero terms as (k, a_k)
+        self._a = []
+        self._a_terms = []
+        if n is None and g is not None and f is not None:
+            n = min(len(g), len(f))
+        super().__init__(n, **options)
+
+    def g_series(self, n: int) -> list[int]:
+        """Return the first n coefficients of g."""
+        return self._given_series(0, n)
+
+    def f_series(self, n: int) -> list[int]:
+        """Return the first n coefficients of f."""
+        return self._given_series(1, n)
+
+    def _given_series(self, index: int, n: int) -> list[int]:
+        """Return the first n coefficients of the series given to the constructor."""
+        series = self._series[index]
+        if series is None or len(series) < n:
+            raise ValueError(f"Expected at least {n} coefficients of {'gf'[index]}.")
+        return list(series[:n])
+
+    @staticmethod
+    def _check_series(g: list[int], f: list[int]) -> None:
+        """Raise a ValueError unless g and f define a Riordan array."""
+        if g[0] == 0 or f[0] != 0 or (len(f) > 1 and f[1] == 0):
+            raise ValueError("A Riordan array needs g(0) != 0, f(0) = 0 and f'(0) != 0.")
+
+    def _has_row_recurrence(self) -> bool:
+        """Check whether rows follow from the A-sequence, which needs f'(0), or g(0) f'(0) modulo the modulus,
+        to be invertible."""
+        if self.n <= 1:
+            return True
+        g0, f1 = self.g_series(1)[0], self.f_series(2)[1]
+        if self.modulus is None:
+            return f1 in (1, -1)
+        return gcd(g0 * f1, self.modulus) == 1
+
+    def generate_triangle(self) -> list[list[int]]:
+        """Generate the triangle row by row from the A-sequence, or column by column if it does not apply."""
+        if self._has_row_recurrence():
+            return super().generate_triangle()
+        return self._generate_columns()
+
+    def _generate_columns(self) -> list[list[int]]:
+        """Generate the triangle column by column, multiplying by f / x once per column."""
+        n = self.n
+        if n == 0:
+            return []
+        g, f = self.g_series(n), self.f_series(n)
+        self._check_series(g, f)
+        shifted = f[1:]
+        rows = [[] for _ in range(n)]
+        # Column k is x^k times g (f / x)^k, of which the first n - k coefficients are kept
+        column = g if self.modulus is None else [c % self.modulus for c in g]
+        for k in range(n):
+            for i, value in enumerate(column):
+                rows[k + i].append(value)
+            column = series_multiply(column, shifted, n - k - 1, self.modulus)
+        if self.modulus is not None:
+            return [np.array(row, dtype=modular_dtype(self.modulus)) for row in rows]
+        return rows
+
+    def _edges(self, count: int) -> tuple[list[int], list[int]]:
+        """Return the first `count` coefficients of g and g f, which are columns 0 and 1 of the triangle."""
+        if self._left is None or len(self._left) < count:
+            g, f = self.g_series(count), self.f_series(count)
+            self._check_series(g, f)
+            self._left = g if self.modulus is None else [c % self.modulus for c in g]
+            self._column = series_multiply(g, f, count, self.modulus)
+        return self._left, self._column
+
+    def next_row(self, i: int, previous: list[int] | None) -> list[int]:
+        """Generate row i from row i - 1 with the A-sequence."""
+        left, column = self._edges(max(self.n, i + 1))
+        if i == 0:
+            return [left[0]] if self.modulus is None else self._modular_row([left[0]])
+        if len(self._a) < i:
+            self._next_a_term(previous, column[i])
+        if self.modulus is None:
+            return [left[i]] + self._apply_a_sequence(previous)
+        row = np.empty(i + 1, dtype=previous.dtype)
+        row[0] = left[i]
+        row[1:] = self._apply_a_sequence(previous)
+        return row
+
+    def _next_a_term(self, previous: list[int], target: int) -> None:
+        """Find a_k from row k and T(k+1, 1) = target, as T(k+1, 1) is the sum of a_t T(k, t) over t <= k."""
+        k = len(previous) - 1
+        remainder = target - sum(a * int(previous[t]) for t, a in self._a_terms)
+        # T(k, k) = g(0) f'(0)^k
+        if self.modulus is None:
+            term = remainder // int(previous[k])
+        else:
+            term = remainder * pow(int(previous[k]), -1, self.modulus) % self.modulus
+        self._a.append(term)
+        if term:
+            self._a_terms.append((k, term))
+
+    def _apply_a_sequence(self, previous: list[int]) -> list[int] | np.ndarray:
+        """Return the sum of a_k previous[j + k] over k for each position j of the previous row."""
+        count = len(previous)
+        terms = [(k, a) for k, a in self._a_terms if k < count]
+        modulus = self.modulus
+        if modulus is None:
+            if len(terms) <= SPARSE_TERMS:
+                row = [0] * count
+                for k, a in terms:
+                    row[:count - k] = map(add, row, previous[k:] if a == 1 else [a * value for value in previous[k:]])
+                return row
+            # Reversing the row turns these sums into the coefficients of a series product
+            return series_multiply(previous[::-1], self._a[:count], count)[::-1]
+
+        if len(terms) <= SPARSE_TERMS:
+            dtype = np.int64 if len(terms) * (modulus - 1) ** 2 < 2**63 else object
+            parents = previous.astype(dtype)
+            row = np.zeros(count, dtype=dtype)
+            for k, a in terms:
+                row[:count - k] += a * parents[k:]
+            return row % modulus
+        if count * (modulus - 1) ** 2 < 2**63:
+            a = np.array(self._a[:count], dtype=np.int64)
+            return _short_convolve(previous[::-1].astype(np.int64), a, count)[::-1] % modulus
+        return series_multiply(previous[::-1].tolist(), self._a[:count], count, modulus)[::-1]
+
+    def series(self) -> tuple[list[int], list[int]]:
+        """Return the first n coefficients of g and f."""
+        return self.g_series(self.n), self.f_series(self.n)
+
+    def __matmul__(self, other):
+        """Multiply two Riordan arrays as lower-triangular matrices through their series, or as in `Triangle`."""
+        if not isinstance(other, RiordanTriangle):
+            return super().__matmul__(other)
+        modulus = self._shared_modulus(other)
+        self._check_same_size(other)
+        n = self.n
+        g, f = self.g_series(n), self.f_series(n)
+        h, l = other.g_series(n), other.f_series(n)
+        return RiordanTriangle(
+            n,
+            g=series_multiply(g, series_compose(h, f, n, modulus), n, modulus),
+            f=series_compose(l, f, n, modulus),
+            modulus=modulus,
+        )
+
+    def inverse(self) -> "RiordanTriangle":
+        """Return the inverse of the triangle as a lower-triangular matrix, which is again a Riordan array."""
+        g, f = self.series()
+        reversion = series_reversion(f, self.n)
+        return RiordanTriangle(
+            self.n,
+            g=series_inverse(series_compose(g, reversion, self.n), self.n),
+            f=reversion,
+            modulus=self.modulus,
+        )
@@ -0,0 +1,88 @@
+"""Triangles defined declaratively by their edges and a recurrence over the two parents of each entry."""
+from operator import add
+from typing import Callable
+import numpy as np
+
+from triforce.sequences import LinearRecurrence
+from triforce.storage import INT64_BOUND
+from triforce.triangle import Triangle
+
+
+class RuleTriangle(Triangle):
+    """Triangle defined by two edge sequences and a weighted sum of the two parents of each interior entry.
+
+    Entry (i, 0) is `left_edge(i)`, entry (i, i) is `right_edge(i)` for i > 0, and every other entry is
+    `left_weight * T(i-1, j-1) + right_weight * T(i-1, j)`. Subclasses only set these class attributes, and rows
+    are computed by a vectorized NumPy kernel, so lazy, packed, modular and streaming modes all come from
+    `Triangle`. Edges are either a `LinearRecurrence`, whose terms are computed directly modulo the modulus, or
+    any function of the row index.
+    """
+    left_edge: LinearRecurrence | Callable[[int], int] = LinearRecurrence([1], [1])
+    right_edge: LinearRecurrence | Callable[[int], int] | None = None  # The same as `left_edge` if None
+    left_weight = 1
+    right_weight = 1
+    modular_rows = True
+
+    def next_row(self, i: int, previous: list[int] | None) -> list[int]:
+        """Generate row i from row i - 1 with the row kernel."""
+        left = self._edge(type(self).left_edge, i)
+        if i == 0:
+            return [left] if self.modulus is None else self._modular_row([left])
+        right = self._edge(type(self).right_edge or type(self).left_edge, i)
+        if self.modulus is not None:
+            return self._modular_kernel(previous, left, right)
+
+        # Use int64 while neither the parents nor their weighted sums can overflow it, and Python integers after
+        weight = abs(self.left_weight) + abs(self.right_weight)
+        high, low = max(previous), min(previous)
+        if max(high, -low) * weight < INT64_BOUND:
+            parents = np.array(previous, dtype=np.int64)
+            interior = (self.left_weight * parents[:-1] + self.right_weight * parents[1:]).tolist()
+        elif self.left_weight == self.right_weight == 1:
+            interior = list(map(add, previous[:-1], previous[1:]))
+        else:
+            interior = [self.left_weight * x + self.right_weight * y for x, y in zip(previous[:-1], previous[1:])]
+        return [left] + interior + [right]
+
+    def _edge(self, edge: LinearRecurrence | Callable[[int], int], i: int) -> int:
+        """Return term i of an edge sequence, reduced modulo `self.modulus` if it is set."""
+        if isinstance(edge, LinearRecurrence):
+            return edge.term(i, self.modulus)
+        return edge(i) if self.modulus is None else edge(i) % self.modulus
+
+    def _modular_kernel(self, previous: np.ndarray, left: int, right: int) -> np.ndarray:
+        """Return the row following `previous` modulo `self.modulus` in the dtype of `previous`."""
+        modulus = self.modulus
+        left_weight, right_weight = self.left_weight % modulus, self.right_weight % modulus
+        dtype = np.int64 if (left_weight + right_weight) * (modulus - 1) < 2**63 else object
+        parents = previous.astype(dtype)
+        row = np.empty(len(previous) + 1, dtype=previous.dtype)
+        row[0], row[-1] = left, right
+        row[1:-1] = (left_weight * parents[:-1] + right_weight * parents[1:]) % modulus
+        return row
+
+
+def rule_triangle(
+    name: str,
+    left_edge: LinearRecurrence | Callable[[int], int],
+    right_edge: LinearRecurrence | Callable[[int], int] = None,
+    left_weight: int = 1,
+    right_weight: int = 1,
+) -> type:
+    """Create a `RuleTriangle` subclass from its edges and parent weights.
+
+    Args:
+        name (str): The name of the class.
+        left_edge (LinearRecurrence | Callable): The sequence of entries (i, 0).
+        right_edge (LinearRecurrence | Callable): The sequence of entries (i, i), or None to mirror the left edge.
+        left_weight (int): The weight of parent (i - 1, j - 1).
+        right_weight (int): The weight of parent (i - 1, j).
+    """
+    return type(name, (RuleTriangle,), {
+        "__doc__": f"Triangle with interior T(i, j) = {left_weight} T(i-1, j-1) + {right_weight} T(i-1, j).",
+        "left_edge": left_edge if isinstance(left_edge, LinearRecurrence) else staticmethod(left_edge),
+        "right_edge": right_edge if right_edge is None or isinstance(right_edge, LinearRecurrence)
+        else staticmethod(right_edge),
+        "left_weight": left_weight,
+        "right_weight": right_weight,
+    })
@@ -1,76 +1,210 @@
 """Integer sequences used to generate triangular arrays."""
 
-from math import floor
+from functools import lru_cache
+from math import comb, floor
+from threading import Lock
 from triforce.constants import PHI, PHI2
 
 
+def _matrix_multiply(a: list[list[int]], b: list[list[int]], modulus: int = None) -> list[list[int]]:
+    """Multiply two square integer matrices, optionally modulo `modulus`."""
+    columns = list(zip(*b))
+    product = [[sum(x * y for x, y in zip(row, col)) for col in columns] for row in a]
+    if modulus is not None:
+        product = [[value % modulus for value in row] for row in product]
+    return product
+
+
+def _matrix_power(matrix: list[list[int]], exponent: int, modulus: int = None) -> list[list[int]]:
+    """Raise a square integer matrix to a non-negative power by repeated squaring."""
+    size = len(matrix)
+    result = [[int(i == j) for j in range(size)] for i in range(size)]
+    while exponent:
+        if exponent & 1:
+            result = _matrix_multiply(result, matrix, modulus)
+        exponent >>= 1
+        if exponent:
+            matrix = _matrix_multiply(matrix, matrix, modulus)
+    return result
+
+
+def fibonacci_pair(n: int, modulus: int = None) -> tuple[int, int]:
+    """Return (F(n), F(n+1)), optionally modulo `modulus`, using the fast doubling identities."""
+    if n < 0:
+        raise ValueError("Index must be non-negative.")
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        # F(2k) = F(k) (2F(k+1) - F(k)) and F(2k+1) = F(k)^2 + F(k+1)^2
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        a, b = (d, c + d) if bit == "1" else (c, d)
+        if modulus is not None:
+            a, b = a % modulus, b % modulus
+    return a, b
+
+
+class LinearRecurrence:
+    """Linear recurrence a(n) = c_1 a(n-1) + ... + c_k a(n-k) with O(log n) term access.
+
+    Terms are computed by exponentiating the companion matrix of the recurrence, so a single term costs
+    O(k^3 log n) big-integer operations instead of the O(n) of iterating the recurrence. Recurrences with
+    the Fibonacci coefficients [1, 1] use fast doubling instead.
+    """
+    def __init__(self, coefficients: list[int], initial: list[int]):
+        """Initialize the recurrence.
+
+        Args:
+            coefficients (list[int]): The coefficients c_1, ..., c_k of the recurrence.
+            initial (list[int]): The initial terms a(0), ..., a(k-1).
+        """
+        if not coefficients or len(coefficients) != len(initial):
+            raise ValueError("Coefficients and initial terms must be non-empty and of equal length.")
+        self.coefficients = list(coefficients)
+        self.initial = list(initial)
+
+    def __call__(self, n: int) -> int:
+        return self.term(n)
+
+    def companion_matrix(self) -> list[list[int]]:
+        """Return the companion matrix mapping (a(n+k-1), ..., a(n)) to (a(n+k), ..., a(n+1))."""
+        order = len(self.coefficients)
+        matrix = [list(self.coefficients)]
+        for i in range(order - 1):
+            matrix.append([int(j == i) for j in range(order)])
+        return matrix
+
+    def term(self, n: int, modulus: int = None) -> int:
+        """Return the n-th term of the recurrence, optionally modulo `modulus`."""
+        if n < 0:
+            raise ValueError("Index must be non-negative.")
+        order = len(self.coefficients)
+        if n < order:
+            value = self.initial[n]
+        elif self.coefficients == [1, 1]:
+            # a(n) = a(0) F(n-1) + a(1) F(n)
+            a, b = fibonacci_pair(n - 1, modulus)
+            value = self.initial[0] * a + self.initial[1] * b
+        else:
+            power = _matrix_power(self.companion_matrix(), n - order + 1, modulus)
+            value = sum(c * a for c, a in zip(power[0], reversed(self.initial)))
+        return value if modulus is None else value % modulus
+
+    def prefix(self, n: int) -> list[int]:
+        """Return the first n terms of the recurrence in one pass."""
+        order = len(self.coefficients)
+        terms = self.initial[:n]
+        for _ in range(order, n):
+            terms.append(sum(c * a for c, a in zip(self.coefficients, reversed(terms[-order:]))))
+        return terms
+
+
+class SequenceCache:
+    """Thread-safe cache of sequence terms shared by every caller.
+
+    The leading `maxsize` terms are kept in a table that grows in one pass of the recurrence, while terms
+    beyond the table are computed directly and kept in a bounded LRU cache.
+    """
+    def __init__(self, sequence: LinearRecurrence, maxsize: int = 4096, lru_size: int = 256):
+        """Initialize the cache.
+
+        Args:
+            sequence (LinearRecurrence): The sequence whose terms are cached.
+            maxsize (int): The number of leading terms the table may hold.
+            lru_size (int): The number of terms beyond the table kept by the LRU cache.
+        """
+        self.sequence = sequence
+        self.maxsize = maxsize
+        self._table = []
+        self._lock = Lock()
+        self._term = lru_cache(maxsize=lru_size)(sequence.term)
+
+    def __call__(self, n: int) -> int:
+        if n < 0:
+            raise ValueError("Index must be non-negative.")
+        if n >= self.maxsize:
+            return self._term(n)
+        return self._ensure(n + 1)[n]
+
+    def _ensure(self, n: int) -> list[int]:
+        """Grow the table to hold at least the first n terms and return it."""
+        table = self._table
+        if len(table) < n:
+            with self._lock:
+                if len(self._table) < n:
+                    # Grow geometrically so repeated requests cost O(1) amortized terms each
+                    self._table = self.sequence.prefix(min(self.maxsize, max(n, 2 * len(self._table))))
+                table = self._table
+        return table
+
+    def prefix(self, n: int) -> list[int]:
+        """Return the first n terms of the sequence."""
+        if n > self.maxsize:
+            return self.sequence.prefix(n)
+        return self._ensure(n)[:n]
+
+    def clear(self) -> None:
+        """Empty the table and the LRU cache."""
+        with self._lock:
+            self._table = []
+        self._term.cache_clear()
+
+
+FIBONACCI = LinearRecurrence([1, 1], [0, 1])
+LUCAS = LinearRecurrence([1, 1], [2, 1])
+PELL = LinearRecurrence([2, 1], [0, 1])
+PELL_LUCAS = LinearRecurrence([2, 1], [2, 2])
+TRIBONACCI = LinearRecurrence([1, 1, 1], [0, 0, 1])
+
+FIBONACCI_CACHE = SequenceCache(FIBONACCI)
+LUCAS_CACHE = SequenceCache(LUCAS)
+PELL_CACHE = SequenceCache(PELL)
+PELL_LUCAS_CACHE = SequenceCache(PELL_LUCAS)
+TRIBONACCI_CACHE = SequenceCache(TRIBONACCI)
+
+
 def fibonacci(n: int) -> int:
     """OEIS-A000045: Generate n-th Fibonacci number."""
     if n <= 1:
         return n
-    a, b = 0, 1
-    for _ in range(2, n+1):
-        a, b = b, a + b
-    return b
+    return FIBONACCI_CACHE(n)
 
 
 def tribonacci(n: int) -> int:
     """Generate the n-th Tribonacci number."""
-    if n == 0:
-        return 0
-    if n in [1, 2]:
-        return 0 if n == 1 else 1
-
-    a, b, c = 0, 0, 1
-    for _ in range(3, n + 1):
-        a, b, c = b, c, a + b + c
-    return c
+    return TRIBONACCI_CACHE(n)
 
 
 def lucas(n: int) -> int:
     """OEIS-A000032: Generate nth Lucas number."""
-    if n == 0:
-        return 2
-    if n == 1:
-        return 1
-    a, b = 2, 1
-    for _ in range(2, n+1):
-        a, b = b, a + b
-    return b
+    return LUCAS_CACHE(n)
 
 
 def pell(n: int) -> int:
     """OEIS-A000129: Generate nth Pell number."""
-    if n == 0:
-        return 0
-    if n == 1:
-        return 1
-    a, b = 0, 1
-    for _ in range(2, n+1):
-        a, b = b, 2 * b + a
-    return b
+    return PELL_CACHE(n)
 
 
 def pell_lucas(n: int) -> int:
     """OEIS-A002203: Generate nth Pell-Lucas number."""
-    if n == 0:
-        return 2
-    if n == 1:
-        return 2
-    a, b = 2, 2
-    for _ in range(2, n+1):
-        a, b = b, 2 * b + a
-    return b
+    return PELL_LUCAS_CACHE(n)
 
 
 def catalan(n: int) -> int:
     """OEIS-A000108: Generate nth Catalan number."""
     if n <= 1:
         return 1
-    res = 0
-    for i in range(n):
-        res += catalan(i) * catalan(n-1-i)
-    return res
+    return comb(2 * n, n) // (n + 1)
+
+
+def catalan_prefix(n: int) -> list[int]:
+    """OEIS-A000108: Generate the first n Catalan numbers."""
+    terms = []
+    value = 1
+    for k in range(n):
+        terms.append(value)
+        # C(k+1) = C(k) * 2(2k+1) / (k+2)
+        value = value * 2 * (2 * k + 1) // (k + 2)
+    return terms
 
 
 def lower_wythoff(n: int):
@@ -0,0 +1,391 @@
+"""Storage backends for the rows of a triangle and the layers of a pyramid."""
+from collections import OrderedDict
+from math import isqrt
+from typing import Callable, Iterable, Iterator
+import numpy as np
+
+from triforce.sequences import tetrahedral
+
+
+# Entries below this bound are stored as int64, leaving headroom for differences of two entries.
+INT64_BOUND = 2**62
+
+
+def modular_dtype(modulus: int, terms: int = 2) -> np.dtype:
+    """Return the narrowest unsigned dtype that holds the sum of `terms` residues modulo `modulus`."""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if terms * (modulus - 1) <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class LazyRows:
+    """Rows of a triangle generated on demand and kept in a bounded LRU window."""
+    def __init__(
+        self,
+        n: int,
+        next_row: Callable[[int, list[int] | None], list[int]],
+        closed_form: bool = False,
+        cache_size: int = 128,
+    ):
+        """Initialize lazy rows from a row recurrence.
+
+        Args:
+            n (int): The number of rows.
+            next_row (Callable): Function mapping a row index and the previous row (or None) to the row.
+            closed_form (bool): Whether `next_row` can compute any row without the previous one.
+            cache_size (int): The maximum number of rows kept in memory.
+        """
+        if cache_size < 1:
+            raise ValueError("Cache size must be at least 1.")
+        self.n = n
+        self.next_row = next_row
+        self.closed_form = closed_form
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.row(i) for i in range(*key.indices(self.n))]
+        if key < 0:
+            key += self.n
+        if not 0 <= key < self.n:
+            raise IndexError("Row index out of range.")
+        return self.row(key)
+
+    def __iter__(self):
+        return self.rows(0, self.n)
+
+    def _remember(self, i: int, row: list[int]) -> None:
+        """Store a row in the cache, evicting the least recently used row if needed."""
+        self._cache[i] = row
+        self._cache.move_to_end(i)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def row(self, i: int) -> list[int]:
+        """Return row i, generating it from the nearest cached earlier row if needed."""
+        if i in self._cache:
+            self._cache.move_to_end(i)
+            return self._cache[i]
+
+        if self.closed_form:
+            row = self.next_row(i, self._cache.get(i - 1))
+            self._remember(i, row)
+            return row
+
+        # Resume the recurrence from the closest cached row before the requested one.
+        start = max((k for k in self._cache if k < i), default=-1)
+        row = self._cache[start] if start >= 0 else None
+        for k in range(start + 1, i + 1):
+            row = self.next_row(k, row)
+            self._remember(k, row)
+        return row
+
+    def rows(self, start: int, stop: int) -> Iterator[list[int]]:
+        """Yield rows start through stop - 1 without growing the cache."""
+        previous = None
+        if start > 0 and not self.closed_form:
+            previous = self.row(start - 1)
+        for i in range(start, stop):
+            if i in self._cache:
+                previous = self._cache[i]
+            else:
+                previous = self.next_row(i, previous)
+            yield previous
+
+
+class RowView:
+    """Zero-copy view of one row of a packed triangle that reads like a list of Python integers."""
+    __slots__ = ("values", "start", "length")
+
+    def __init__(self, values: np.ndarray, start: int, length: int):
+        """Initialize the view of `length` entries of `values` starting at position `start`."""
+        self.values = values
+        self.start = start
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.array()[key].tolist()
+        if key < 0:
+            key += self.length
+        if not 0 <= key < self.length:
+            raise IndexError("Column index out of range.")
+        return int(self.values[self.start + key])
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __eq__(self, other):
+        try:
+            return self.tolist() == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+    def array(self) -> np.ndarray:
+        """Return the row as a NumPy view sharing memory with the packed triangle."""
+        return self.values[self.start:self.start + self.length]
+
+    def tolist(self) -> list[int]:
+        """Return the row as a list of Python integers."""
+        return self.array().tolist()
+
+
+def python_row(row: list[int] | np.ndarray | RowView) -> list[int]:
+    """Return a row as a list of Python integers, so that fixed-width modular rows do not overflow in sums."""
+    if isinstance(row, (np.ndarray, RowView)):
+        return row.tolist()
+    return row
+
+
+class PackedRows:
+    """Rows of a triangle packed into one flat array in row-major triangular order.
+
+    Entry (i, j) is stored at position i(i+1)/2 + j. The array is int64 when every entry fits and falls back
+    to an object array of Python integers otherwise, so results always match the list backend exactly.
+    """
+    def __init__(self, values: np.ndarray, n: int):
+        """Initialize packed rows from a flat array holding n(n+1)/2 entries."""
+        if len(values) != n * (n + 1) // 2:
+            raise ValueError("A packed triangle with n rows must hold n(n+1)/2 entries.")
+        self.values = values
+        self.n = n
+        self._indices = None
+        # Spare capacity for `extend`, of which `values` is the leading view
+        self._buffer = values
+
+    @classmethod
+    def from_flat(cls, values: np.ndarray) -> "PackedRows":
+        """Wrap a flat array of n(n+1)/2 entries in row-major triangular order without copying it."""
+        n = (isqrt(8 * len(values) + 1) - 1) // 2
+        return cls(values, n)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[list[int]], n: int) -> "PackedRows":
+        """Pack n rows, where row i holds i + 1 entries."""
+        packed = cls(np.empty(0, dtype=np.int64), 0)
+        packed.extend(rows, n)
+        return packed
+
+    def extend(self, rows: Iterable[list[int]], n: int) -> None:
+        """Append rows until the triangle holds n rows, growing the underlying buffer geometrically."""
+        size = n * (n + 1) // 2
+        if len(self._buffer) < size:
+            buffer = np.empty(max(size, 2 * len(self._buffer)), dtype=self._buffer.dtype)
+            buffer[:len(self.values)] = self.values
+            self._buffer = buffer
+        position = len(self.values)
+        for i, row in enumerate(rows, self.n):
+            if len(row) != i + 1:
+                raise ValueError("Row i of a packed triangle must hold i + 1 entries.")
+            if self._buffer.dtype != object and (max(row) >= INT64_BOUND or min(row) <= -INT64_BOUND):
+                self._buffer = self._buffer.astype(object)
+            self._buffer[position:position + i + 1] = row
+            position += i + 1
+        if position != size:
+            raise ValueError(f"Expected {n} rows to pack.")
+        self.values = self._buffer[:size]
+        self.n = n
+        self._indices = None
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(self.n))]
+        if key < 0:
+            key += self.n
+        if not 0 <= key < self.n:
+            raise IndexError("Row index out of range.")
+        return RowView(self.values, key * (key + 1) // 2, key + 1)
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self[i]
+
+    def indices(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return the row and column index of every packed entry."""
+        if self._indices is None:
+            rows = np.repeat(np.arange(self.n), np.arange(1, self.n + 1))
+            cols = np.arange(len(self.values)) - rows * (rows + 1) // 2
+            self._indices = (rows, cols)
+        return self._indices
+
+    def _summable(self) -> np.ndarray:
+        """Return the entries in a dtype whose sums and differences of up to n terms cannot overflow.
+
+        Narrow and unsigned dtypes, such as those of modular or memory-mapped rows, are widened to int64.
+        """
+        values = self.values
+        if values.dtype == object:
+            return values
+        if len(values) and int(np.abs(values).max()) * self.n >= 2**63:
+            return values.astype(object)
+        return values.astype(np.int64, copy=False)
+
+    def _split(self, values: np.ndarray) -> list[list[int]]:
+        """Split flat packed values back into rows of Python integers."""
+        flat = values.tolist()
+        return [flat[i * (i + 1) // 2:(i + 1) * (i + 2) // 2] for i in range(self.n)]
+
+    def row_sums(self) -> list[int]:
+        """Calculate the sum of each row."""
+        if self.n == 0:
+            return []
+        return np.add.reduceat(self._summable(), np.arange(self.n) * np.arange(1, self.n + 1) // 2).tolist()
+
+    def line_sums(self, keys: np.ndarray) -> list[int]:
+        """Sum the entries grouped by a non-negative key per entry, such as the column or diagonal index."""
+        values = self._summable()
+        sums = np.zeros(self.n, dtype=values.dtype)
+        np.add.at(sums, keys, values)
+        return sums.tolist()
+
+    def column_sums(self) -> list[int]:
+        """Calculate the sum of each column."""
+        return self.line_sums(self.indices()[1])
+
+    def diagonal_sums(self, direction: str = "right") -> list[int]:
+        """Calculate the sum of each diagonal."""
+        rows, cols = self.indices()
+        if direction == "right":
+            return self.line_sums(cols)
+        if direction == "left":
+            return self.line_sums(rows - cols)
+        raise ValueError("Direction must be either 'left' or 'right'.")
+
+    def row_differences(self) -> list[list[int]]:
+        """Calculate the difference between consecutive rows."""
+        rows, cols = self.indices()
+        current = np.flatnonzero(cols < rows)
+        # Entry (i-1, j) sits i positions before entry (i, j)
+        values = self._summable()
+        differences = (values[current] - values[current - rows[current]]).tolist()
+        return [differences[(i - 1) * i // 2:i * (i + 1) // 2] for i in range(1, self.n)]
+
+    def mod_triangle(self, k: int) -> list[list[int]]:
+        """Calculate the triangle with entries modulo k."""
+        values = self.values
+        if values.dtype != object and not -2**63 <= k < 2**63:
+            values = values.astype(object)
+        return self._split(values % k)
+
+
+class PackedLayers:
+    """Layers of a pyramid packed into one flat array in tetrahedral order.
+
+    Layer i holds rows r = 0, ..., i of i - r + 1 entries and starts at the tetrahedral number i(i+1)(i+2)/6.
+    Within the layer, row r starts r(2i+3-r)/2 entries in. As in `PackedRows`, the array is int64 when every entry
+    fits and an object array of Python integers otherwise.
+    """
+    def __init__(self, values: np.ndarray, n: int):
+        """Initialize packed layers from a flat array holding n(n+1)(n+2)/6 entries."""
+        if len(values) != n * (n + 1) * (n + 2) // 6:
+            raise ValueError("A packed pyramid with n layers must hold n(n+1)(n+2)/6 entries.")
+        self.values = values
+        self.n = n
+        self.layer_starts = np.array([0] + tetrahedral(n), dtype=np.int64)
+        # Spare capacity for `extend`, of which `values` is the leading view
+        self._buffer = values
+
+    @classmethod
+    def from_layers(cls, layers: Iterable[list[list[int]]], n: int) -> "PackedLayers":
+        """Pack n layers, where layer i holds rows of i + 1, i, ..., 1 entries."""
+        packed = cls(np.empty(0, dtype=np.int64), 0)
+        packed.extend(layers, n)
+        return packed
+
+    def extend(self, layers: Iterable[list[list[int]]], n: int) -> None:
+        """Append layers until the pyramid holds n layers, growing the underlying buffer geometrically."""
+        size = n * (n + 1) * (n + 2) // 6
+        if len(self._buffer) < size:
+            buffer = np.empty(max(size, 2 * len(self._buffer)), dtype=self._buffer.dtype)
+            buffer[:len(self.values)] = self.values
+            self._buffer = buffer
+        position = len(self.values)
+        for i, layer in enumerate(layers, self.n):
+            if [len(row) for row in layer] != list(range(i + 1, 0, -1)):
+                raise ValueError("Row r of layer i of a packed pyramid must hold i - r + 1 entries.")
+            for row in layer:
+                if position == 0 and isinstance(row, np.ndarray):
+                    # Keep the fixed width of modular layers
+                    self._buffer = self._buffer.astype(row.dtype)
+                if self._buffer.dtype != object and (max(row) >= INT64_BOUND or min(row) <= -INT64_BOUND):
+                    self._buffer = self._buffer.astype(object)
+                self._buffer[position:position + len(row)] = row
+                position += len(row)
+        if position != size:
+            raise ValueError(f"Expected {n} layers to pack.")
+        self.values = self._buffer[:size]
+        self.n = n
+        self.layer_starts = np.array([0] + tetrahedral(n), dtype=np.int64)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(self.n))]
+        if key < 0:
+            key += self.n
+        if not 0 <= key < self.n:
+            raise IndexError("Layer index out of range.")
+        start = int(self.layer_starts[key])
+        return [RowView(self.values, start + self.row_offset(key, r), key - r + 1) for r in range(key + 1)]
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self[i]
+
+    @staticmethod
+    def row_offset(i, r):
+        """Return the position of row r within layer i, for integers or arrays of indices."""
+        return r * (2 * i + 3 - r) // 2
+
+    def layer_array(self, i: int) -> np.ndarray:
+        """Return layer i as a flat NumPy view sharing memory with the packed pyramid."""
+        return self.values[self.layer_starts[i]:self.layer_starts[i + 1]]
+
+    def layer_sums(self) -> list[int]:
+        """Calculate the sum of each layer."""
+        if self.n == 0:
+            return []
+        values = self.values
+        if values.dtype != object and len(values) and int(np.abs(values).max()) * len(values) >= 2**63:
+            values = values.astype(object)
+        elif values.dtype != object:
+            values = values.astype(np.int64, copy=False)
+        return np.add.reduceat(values, self.layer_starts[:-1]).tolist()
+
+    def cross_section(self, axis: str, index: int) -> np.ndarray:
+        """Return the entries of the plane where coordinate `axis` of (i, j, k) equals `index`, in row-major order.
+
+        Entry (r, c) of layer m has coordinates i = r, j = c and k = m - r - c. Each plane is a triangle of
+        n - index rows, and row t of it is taken from layer index + t.
+        """
+        if not 0 <= index < self.n:
+            raise IndexError("Cross-section index out of range.")
+        lengths = np.arange(1, self.n - index + 1)
+        layers = np.repeat(np.arange(index, self.n), lengths)
+        # Position of each entry within its row of the plane
+        steps = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        if axis == "i":
+            rows, cols = np.full_like(steps, index), steps
+        elif axis == "j":
+            rows, cols = steps, np.full_like(steps, index)
+        elif axis == "k":
+            rows, cols = steps, layers - index - steps
+        else:
+            raise ValueError("Axis must be one of 'i', 'j' or 'k'.")
+        return self.values[self.layer_starts[layers] + self.row_offset(layers, rows) + cols]
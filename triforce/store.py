@@ -0,0 +1,161 @@
+"""Memory-mapped on-disk storage for generated triangles.
+
+A saved triangle is laid out as:
+
+- the 8-byte magic `TRIFORCE`,
+- the data section, starting at byte 8,
+- the row offset table of n + 1 little-endian int64 byte offsets into the data section,
+- a UTF-8 JSON header holding the class, n, dtype, modulus, encoding and the position of the offset table,
+- the length of the JSON header as a little-endian uint64.
+
+Rows are stored in one of two encodings. With the 'fixed' encoding the data section is the packed triangle in
+row-major order in a fixed-width dtype, so loading it maps the file as a `PackedRows` without reading it. With
+the 'limbs' encoding, used when an entry does not fit in int64, row i is stored as i + 1 little-endian int32
+lengths, padded to 8 bytes, followed by the magnitude of each entry as that many little-endian 64-bit limbs.
+A negative length marks a negative entry.
+"""
+import importlib
+import json
+import sys
+from typing import Iterator
+import numpy as np
+
+from triforce.storage import INT64_BOUND, PackedRows
+from triforce.triangle import Triangle
+
+
+MAGIC = b"TRIFORCE"
+
+
+def _encode_limbs(row: list[int]) -> bytes:
+    """Encode a row with the variable-length limb encoding."""
+    lengths = []
+    limbs = []
+    for value in row:
+        value = int(value)
+        size = (abs(value).bit_length() + 63) // 64
+        lengths.append(-size if value < 0 else size)
+        limbs.append(abs(value).to_bytes(8 * size, "little"))
+    header = np.array(lengths, dtype="<i4").tobytes()
+    return header + bytes(-len(header) % 8) + b"".join(limbs)
+
+
+def _decode_limbs(buffer: np.ndarray, start: int, count: int) -> list[int]:
+    """Decode a row of `count` entries stored with the variable-length limb encoding at byte `start`."""
+    lengths = buffer[start:start + 4 * count].view("<i4").tolist()
+    position = start + 4 * count + (-4 * count) % 8
+    row = []
+    for length in lengths:
+        size = 8 * abs(length)
+        value = int.from_bytes(buffer[position:position + size].tobytes(), "little")
+        row.append(-value if length < 0 else value)
+        position += size
+    return row
+
+
+class MappedRows:
+    """Rows of a triangle decoded on demand from a memory-mapped file in the limb encoding."""
+    def __init__(self, buffer: np.ndarray, offsets: np.ndarray):
+        """Initialize mapped rows from the bytes of the data section and the n + 1 row offsets."""
+        self.buffer = buffer
+        self.offsets = offsets
+        self.n = len(offsets) - 1
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.row(i) for i in range(*key.indices(self.n))]
+        return self.row(range(self.n)[key])
+
+    def row(self, i: int) -> list[int]:
+        """Decode row i."""
+        return _decode_limbs(self.buffer, int(self.offsets[i]), i + 1)
+
+    def __iter__(self) -> Iterator[list[int]]:
+        for i in range(self.n):
+            yield self.row(i)
+
+
+def save_triangle(triangle: Triangle, path: str) -> None:
+    """Save a triangle to a file that `load_triangle` can memory-map.
+
+    Rows are streamed from `Triangle.iter_rows`, so lazy triangles are saved without holding every row. Rows
+    are written in a fixed-width dtype until an entry does not fit in int64, at which point the rows written
+    so far are re-encoded with limbs.
+
+    The class is recorded by name, so it must be importable by that name. Classes created at run time, such as
+    those from `rules.rule_triangle`, are rejected.
+    """
+    cls = type(triangle)
+    if getattr(sys.modules.get(cls.__module__), cls.__qualname__, None) is not cls:
+        raise ValueError(f"{cls.__qualname__} cannot be imported by name, so it cannot be loaded once saved.")
+    dtype = None
+    offsets = [0]
+    with open(path, "w+b") as file:
+        file.write(MAGIC)
+        for i, row in enumerate(triangle.iter_rows()):
+            if hasattr(row, "array"):
+                row = row.array()
+            if dtype is None:
+                dtype = row.dtype if isinstance(row, np.ndarray) and row.dtype != object else np.dtype(np.int64)
+            if dtype == np.int64 and len(row) and \
+                    (int(max(row)) >= INT64_BOUND or int(min(row)) <= -INT64_BOUND):
+                # Switch to limbs, re-encoding the rows written so far
+                file.seek(len(MAGIC))
+                written = np.frombuffer(file.read(offsets[-1]), dtype="<i8")
+                file.seek(len(MAGIC))
+                file.truncate()
+                offsets = [0]
+                for k in range(i):
+                    offsets.append(offsets[-1] + file.write(_encode_limbs(written[k * (k + 1) // 2:][:k + 1])))
+                dtype = np.dtype(object)
+            if dtype == object:
+                data = _encode_limbs(row)
+            else:
+                data = np.asarray(row, dtype=dtype.newbyteorder("<")).tobytes()
+            offsets.append(offsets[-1] + file.write(data))
+
+        if dtype is None:
+            dtype = np.dtype(np.int64)
+        # Keep the offset table aligned to 8 bytes
+        file.write(bytes(-offsets[-1] % 8))
+        table = len(MAGIC) + offsets[-1] + (-offsets[-1] % 8)
+        file.write(np.array(offsets, dtype="<i8").tobytes())
+        header = json.dumps({
+            "class": f"{cls.__module__}.{cls.__qualname__}",
+            "n": len(offsets) - 1,
+            "dtype": "object" if dtype == object else dtype.str,
+            "modulus": triangle.modulus,
+            "encoding": "limbs" if dtype == object else "fixed",
+            "table": table,
+        }).encode()
+        file.write(header)
+        file.write(len(header).to_bytes(8, "little"))
+
+
+def load_triangle(path: str) -> Triangle:
+    """Load a triangle saved by `save_triangle`, reading its rows lazily from a read-only memory map.
+
+    The file can be mapped by many processes at once, which share its pages through the operating system.
+    """
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    if buffer[:len(MAGIC)].tobytes() != MAGIC:
+        raise ValueError(f"{path} is not a saved triangle.")
+    header_length = int.from_bytes(buffer[-8:].tobytes(), "little")
+    header = json.loads(buffer[-8 - header_length:-8].tobytes())
+
+    module, _, name = header["class"].rpartition(".")
+    cls = getattr(importlib.import_module(module), name)
+    if not (isinstance(cls, type) and issubclass(cls, Triangle)):
+        raise ValueError(f"{header['class']} is not a triangle class.")
+
+    n = header["n"]
+    offsets = buffer[header["table"]:header["table"] + 8 * (n + 1)].view("<i8")
+    data = buffer[len(MAGIC):len(MAGIC) + int(offsets[-1])]
+    if header["encoding"] == "fixed":
+        rows = PackedRows(data.view(np.dtype(header["dtype"])), n)
+    else:
+        rows = MappedRows(data, offsets)
+    return cls(triangle=rows, modulus=header["modulus"])
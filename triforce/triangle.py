@@ -1,17 +1,77 @@
 """Primary Triangle class."""
+from io import StringIO
+from typing import Iterator, TextIO
+import numpy as np
 
-class Triangle:
+from triforce.matrix import lower_inverse, lower_matmul, lower_matvec, to_matrix
+from triforce.parallel import parallel_generate
+from triforce.prefix import PrefixSums
+from triforce.storage import INT64_BOUND, LazyRows, PackedRows, RowView, modular_dtype, python_row
+
+
+class Triangle:  # pylint: disable=too-many-public-methods,too-many-instance-attributes
     """Base Triangle class."""
-    def __init__(self, n: int = None, triangle: list[list[int]] = None):
-        """Initialize the triangle with either n rows or a list of lists."""
+    # Whether `next_row` can compute any row without being given the previous one.
+    closed_form_rows = False
+    # Whether `next_row` can generate rows modulo `self.modulus` as fixed-width NumPy arrays.
+    modular_rows = False
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        n: int = None,
+        triangle: list[list[int]] = None,
+        *,
+        storage: str = "list",
+        cache_size: int = 128,
+        modulus: int = None,
+        workers: int = None,
+    ):
+        """Initialize the triangle with either n rows or a list of lists.
+
+        Args:
+            n (int): The number of rows to generate.
+            triangle (list[list[int]]): The rows of the triangle, used as-is instead of generating them. Packed
+                rows or a flat NumPy array of entries in row-major triangular order are used without copying.
+            storage (str): One of 'list' to generate every row up front, 'lazy' to generate rows on demand or
+                'packed' to store every row in one flat NumPy array with vectorized aggregations.
+            cache_size (int): The maximum number of rows kept in memory by lazy storage.
+            modulus (int): If given, every entry is generated modulo this number and rows are NumPy arrays.
+            workers (int): If greater than one, rows are generated in parallel by this many processes. Only
+                triangles with closed-form rows support it, and lazy storage ignores it.
+        """
+        if storage not in ("list", "lazy", "packed"):
+            raise ValueError("Storage must be one of 'list', 'lazy' or 'packed'.")
+        if modulus is not None and not 1 <= modulus < INT64_BOUND:
+            raise ValueError("Modulus must be a positive integer below 2**62.")
+        self.storage = storage
+        self.modulus = modulus
+        self.workers = workers
+        self._prefix_sums = None
+        self._max_width = None
+        # Whether the rows are the ones the class generates, so that closed forms for entries and lines apply
+        self._own_rows = triangle is None
+
         if triangle is not None:
             # Use the supplied list of lists as the triangle
+            if isinstance(triangle, np.ndarray):
+                triangle = PackedRows.from_flat(triangle)
+            if isinstance(triangle, PackedRows):
+                self.storage = "packed"
             self.triangle = triangle
             self.n = len(triangle)
         elif n is not None:
             # Generate the triangle based on the number of rows
+            if modulus is not None and not self.modular_rows:
+                raise ValueError(f"{type(self).__name__} does not support modular generation.")
+            if self._parallel() and not self.closed_form_rows:
+                raise ValueError(f"{type(self).__name__} does not support parallel generation.")
             self.n = n
-            self.triangle = self.generate_triangle()
+            if storage == "lazy" and self._has_row_recurrence():
+                self.triangle = LazyRows(n, self.next_row, self.closed_form_rows, cache_size)
+            elif storage == "packed":
+                self.triangle = PackedRows.from_rows(self.generate_rows(), n)
+            else:
+                self.triangle = self.generate_triangle()
         else:
             raise ValueError("Either n or triangle must be provided.")
 
@@ -21,104 +81,340 @@ class Triangle:
     def __getitem__(self, key):
         return self.triangle[key]
 
+    def __setitem__(self, key, row):
+        self.triangle[key] = row
+        self._own_rows = False
+        self.invalidate_prefix_sums()
+        self._max_width = None
+
     def __str__(self):
         return self.format_triangle()
 
     def generate_triangle(self) -> list[list[int]]:
-        """Generate the triangle. This should be overridden by subclasses."""
+        """Generate the triangle. Subclasses override either this method or `next_row`."""
+        if self._parallel():
+            return parallel_generate(self, "next_row", self.n, self.workers, dimension=2)
+        triangle = []
+        row = None
+        for i in range(self.n):
+            row = self.next_row(i, row)
+            triangle.append(row)
+        return triangle
+
+    def next_row(self, i: int, previous: list[int] | None) -> list[int]:
+        """Generate row i from the previous row, which is None for the first row or when not available."""
         raise NotImplementedError("Subclasses should implement this method to generate specific triangles.")
 
-    def rising_diagonal(self, row_index: int) -> list[int]:
-        """Extract the rising diagonal starting from the leftmost element of the specified row."""
-        diagonal = []
-        row, col = row_index, 0  # Start at the leftmost element of the specified row
+    def generate_rows(self) -> Iterator[list[int]]:
+        """Yield the rows of the triangle, keeping only the previous row when a row recurrence is available."""
+        if not self._has_row_recurrence() or self._parallel():
+            yield from self.generate_triangle()
+            return
+        yield from self._rows_from(0, self.n, None)
+
+    def extend(self, m: int) -> None:
+        """Grow the triangle to m rows, resuming the row recurrence from its last row.
 
-        # Traverse diagonally up-right
-        while row >= 0 and col < len(self.triangle[row]):
-            diagonal.append(self.triangle[row][col])
-            row -= 1  # Move up
-            col += 1  # Move right
+        Growing a triangle one row at a time this way costs as much in total as generating it once.
+        """
+        if not self._has_row_recurrence():
+            raise ValueError(f"{type(self).__name__} does not generate rows through `next_row`.")
+        if m <= self.n:
+            return
+        if not isinstance(self.triangle, (list, LazyRows, PackedRows)):
+            raise ValueError("Only list, lazy and packed triangles can be extended.")
+        # Rows may be generated through `entry`, which checks indices against the new number of rows
+        start, self.n = self.n, m
+        if isinstance(self.triangle, LazyRows):
+            self.triangle.n = m
+        else:
+            previous = self.triangle[start - 1] if start > 0 else None
+            if isinstance(previous, RowView):
+                previous = previous.tolist() if self.modulus is None else previous.array()
+            rows = self._rows_from(start, m, previous)
+            if isinstance(self.triangle, PackedRows):
+                self.triangle.extend(rows, m)
+            else:
+                self.triangle.extend(rows)
+        self.invalidate_prefix_sums()
+        self._max_width = None
 
-        return diagonal
+    def _rows_from(self, start: int, stop: int, previous: list[int] | None) -> Iterator[list[int]]:
+        """Yield rows start through stop - 1, given row start - 1."""
+        for i in range(start, stop):
+            previous = self.next_row(i, previous)
+            yield previous
+
+    def _modular_row(self, row: list[int]) -> np.ndarray:
+        """Reduce a row of Python integers modulo `self.modulus` into a fixed-width array."""
+        return np.array([value % self.modulus for value in row], dtype=modular_dtype(self.modulus))
+
+    def _parallel(self) -> bool:
+        """Check whether rows are generated by a process pool."""
+        return self.workers is not None and self.workers > 1
+
+    def _has_row_recurrence(self) -> bool:
+        """Check whether rows can be generated one at a time through `next_row`."""
+        return type(self).next_row is not Triangle.next_row
+
+    def iter_rows(self, start: int = 0, stop: int = None) -> Iterator[list[int]]:
+        """Yield rows start through stop - 1, holding only the current row in memory for lazy storage."""
+        stop = self.n if stop is None else min(stop, self.n)
+        if isinstance(self.triangle, LazyRows):
+            yield from self.triangle.rows(start, stop)
+        else:
+            for i in range(start, stop):
+                yield self.triangle[i]
+
+    def entry(self, i: int, j: int) -> int:
+        """Return the entry in row i and column j.
+
+        Subclasses with a closed form for their entries override this so that single entries can be read
+        without generating any rows. Overrides fall back to this method unless `self._own_rows` is set, since
+        supplied or replaced rows need not follow the closed form.
+        """
+        return self.triangle[i][j]
+
+    def _check_entry_index(self, i: int, j: int) -> None:
+        """Raise an IndexError if (i, j) does not lie in the triangle."""
+        if not 0 <= j <= i < self.n:
+            raise IndexError(f"Entry ({i}, {j}) is out of range for a triangle with {self.n} rows.")
+
+    def line(self, i: int, j: int, row_step: int, col_step: int, count: int) -> list[int]:
+        """Return `count` entries starting at (i, j) and moving by (row_step, col_step) each time.
+
+        Diagonals, centers and rising diagonals are all such lines. Subclasses whose consecutive entries along a
+        line are related by a simple ratio override this to extract a line without building the rows.
+        """
+        return [self.entry(i + t * row_step, j + t * col_step) for t in range(count)]
+
+    def rising_diagonal(self, row_index: int) -> list[int]:
+        """Extract the rising diagonal starting from the leftmost element of the specified row."""
+        # Move up and right from (row_index, 0) while the column does not pass the row
+        return self.line(row_index, 0, -1, 1, row_index // 2 + 1)
 
     def rising_diagonal_sums(self) -> list[int]:
         """Calculate the sum of the elements in each rising diagonal."""
-        sums = []
-        for i in range(self.n):
-            diag = self.rising_diagonal(i)
-            sums.append(sum(diag))
+        # Entry (i, j) lies on rising diagonal i + j, so one pass over the rows adds up every diagonal
+        sums = [0] * self.n
+        for i, row in enumerate(self.iter_rows()):
+            for j, value in enumerate(python_row(row)[:self.n - i]):
+                sums[i + j] += value
         return sums
 
+    def prefix_sums(self) -> PrefixSums:
+        """Return the prefix-sum index of the triangle, building it on first use."""
+        if self._prefix_sums is None:
+            self._prefix_sums = PrefixSums(self.iter_rows())
+        return self._prefix_sums
+
+    def invalidate_prefix_sums(self) -> None:
+        """Discard the prefix-sum index, e.g. after modifying the rows in place."""
+        self._prefix_sums = None
+
+    def range_sum(self, row_start: int, row_stop: int, col_start: int, col_stop: int) -> int:
+        """Calculate the sum of the entries in a block of rows and columns in O(1) using the prefix-sum index.
+
+        The index is built on first use, so call `invalidate_prefix_sums` after modifying rows in place.
+        """
+        return self.prefix_sums().range_sum(row_start, row_stop, col_start, col_stop)
+
+    def diagonal_segment_sum(
+        self,
+        diagonal_index: int,
+        start: int = 0,
+        stop: int = None,
+        direction: str = "right",
+    ) -> int:
+        """Calculate the sum of a segment of a diagonal in O(1) using the prefix-sum index.
+
+        Args:
+            diagonal_index (int): The index of the diagonal, or the starting row of a rising diagonal.
+            start (int): The first position along the diagonal.
+            stop (int): One past the last position along the diagonal, or None for its end.
+            direction (str): One of 'right', 'left' or 'rising'.
+        """
+        return self.prefix_sums().diagonal_sum(diagonal_index, start, stop, direction)
+
     def flatten(self) -> list[int]:
-        """Flatten the triangle into a 1D list."""
+        """Flatten the triangle into a 1D list, or a zero-copy NumPy view of the entries for packed storage."""
+        if isinstance(self.triangle, PackedRows):
+            return self.triangle.values.view()
         return [item for row in self.triangle for item in row]
 
+    def to_packed(self) -> PackedRows:
+        """Return the rows packed into one flat array in row-major triangular order."""
+        if isinstance(self.triangle, PackedRows):
+            return self.triangle
+        return PackedRows.from_rows(self.iter_rows(), self.n)
+
+    def to_matrix(self) -> np.ndarray:
+        """Return the triangle as a dense n x n lower-triangular matrix, reduced modulo `self.modulus` if set."""
+        return to_matrix(self.iter_rows(), self.n, self.modulus)
+
+    def _from_matrix(self, matrix: np.ndarray, modulus: int = None) -> "Triangle":
+        """Return the lower triangle of a matrix as a triangle."""
+        if modulus is not None:
+            dtype = modular_dtype(modulus)
+            return Triangle(triangle=[matrix[i, :i + 1].astype(dtype) for i in range(len(matrix))], modulus=modulus)
+        return Triangle(triangle=[matrix[i, :i + 1].tolist() for i in range(len(matrix))])
+
+    def _shared_modulus(self, other: "Triangle") -> int | None:
+        """Return the modulus of a product with another triangle."""
+        if self.modulus is not None and other.modulus is not None and self.modulus != other.modulus:
+            raise ValueError("Triangles with different moduli cannot be multiplied.")
+        return self.modulus if self.modulus is not None else other.modulus
+
+    def _check_same_size(self, other: "Triangle") -> None:
+        """Raise a ValueError unless another triangle has as many rows, as matrix products require."""
+        if other.n != self.n:
+            raise ValueError(f"Expected a triangle with {self.n} rows.")
+
+    def __matmul__(self, other):
+        """Multiply by another triangle as lower-triangular matrices, or by a vector as in `apply`."""
+        if isinstance(other, Triangle):
+            modulus = self._shared_modulus(other)
+            self._check_same_size(other)
+            n = self.n
+            product = lower_matmul(
+                to_matrix(self.iter_rows(), n, modulus), to_matrix(other.iter_rows(), n, modulus), modulus
+            )
+            return self._from_matrix(product, modulus)
+        if isinstance(other, (list, tuple, np.ndarray)):
+            return self.apply(other)
+        return NotImplemented
+
+    def __pow__(self, exponent: int) -> "Triangle":
+        """Raise the triangle to an integer power as a lower-triangular matrix, by repeated squaring.
+
+        Negative powers are powers of `inverse`.
+        """
+        matrix = self.to_matrix()
+        if exponent < 0:
+            matrix = lower_inverse(matrix, self.modulus)
+            exponent = -exponent
+        result = np.identity(self.n, dtype=np.int64)
+        while exponent:
+            if exponent & 1:
+                result = lower_matmul(result, matrix, self.modulus)
+            exponent >>= 1
+            if exponent:
+                matrix = lower_matmul(matrix, matrix, self.modulus)
+        return self._from_matrix(result, self.modulus)
+
+    def inverse(self) -> "Triangle":
+        """Return the inverse of the triangle as a lower-triangular matrix, by forward substitution.
+
+        Over the integers, the diagonal must consist of 1 and -1. With a modulus, it must consist of units.
+        """
+        return self._from_matrix(lower_inverse(self.to_matrix(), self.modulus), self.modulus)
+
+    def apply(self, vector: list[int]) -> list[int]:
+        """Multiply the triangle as a lower-triangular matrix by a vector of length n, streaming the rows."""
+        if len(vector) != self.n:
+            raise ValueError(f"Expected a vector of length {self.n}.")
+        return lower_matvec(self.iter_rows(), vector, self.modulus)
+
     def row_sums(self) -> list[int]:
         """Calculate the sum of each row in the triangle."""
-        return [sum(row) for row in self.triangle]
+        if isinstance(self.triangle, PackedRows):
+            return self.triangle.row_sums()
+        return list(self.iter_row_sums())
+
+    def iter_row_sums(self) -> Iterator[int]:
+        """Yield the sum of each row in the triangle, one row at a time."""
+        for row in self.iter_rows():
+            yield sum(python_row(row))
 
     def column_sums(self) -> list[int]:
-        """Calculate the sum of each column in the triangle."""
-        max_col = len(self.triangle[-1])
-        sums = [0] * max_col
-        for row in self.triangle:
-            for i, val in enumerate(row):
+        """Calculate the sum of each column in the triangle, streaming the rows."""
+        if isinstance(self.triangle, PackedRows):
+            return self.triangle.column_sums()
+        sums = []
+        for row in self.iter_rows():
+            sums.extend([0] * (len(row) - len(sums)))
+            for i, val in enumerate(python_row(row)):
                 sums[i] += val
         return sums
 
     def row_differences(self) -> list[list[int]]:
         """Calculate the difference between consecutive rows in the triangle."""
+        if isinstance(self.triangle, PackedRows):
+            return self.triangle.row_differences()
         differences = []
-        for i in range(1, len(self.triangle)):
-            diff = [self.triangle[i][j] - self.triangle[i-1][j] for j in range(len(self.triangle[i-1]))]
-            differences.append(diff)
+        previous = None
+        for row in self.iter_rows():
+            row = python_row(row)
+            if previous is not None:
+                differences.append([row[j] - previous[j] for j in range(len(previous))])
+            previous = row
         return differences
 
     def cumulative_row_sums(self) -> list[int]:
         """Calculate cumulative sums of each row in the triangle."""
-        row_sums = self.row_sums()
-        return [sum(row_sums[:i+1]) for i in range(len(row_sums))]
+        return list(self.iter_cumulative_row_sums())
+
+    def iter_cumulative_row_sums(self) -> Iterator[int]:
+        """Yield the cumulative sums of each row in the triangle, one row at a time."""
+        total = 0
+        for row_sum in self.iter_row_sums():
+            total += row_sum
+            yield total
 
     def diagonal_sums(self, direction: str = 'right') -> list[int]:
         """Calculate the sum of the diagonals in the triangle."""
-        max_diags = len(self.triangle)
-        sums = []
-        for diag_num in range(max_diags):
-            diagonal = self.diagonal(diag_num, direction)
-            sums.append(sum(diagonal))
+        if isinstance(self.triangle, PackedRows):
+            return self.triangle.diagonal_sums(direction)
+        if direction not in ("left", "right"):
+            raise ValueError("Direction must be either 'left' or 'right'.")
+        # Entry (i, j) lies on right diagonal j and left diagonal i - j
+        sums = [0] * self.n
+        for i, row in enumerate(self.iter_rows()):
+            for j, value in enumerate(python_row(row)):
+                sums[j if direction == "right" else i - j] += value
         return sums
 
     def parity_pattern(self) -> list[list[int]]:
         """Generate a parity pattern where 1 represents odd numbers and 0 represents even numbers."""
-        return [[1 if val % 2 == 1 else 0 for val in row] for row in self.triangle]
+        if isinstance(self.triangle, PackedRows):
+            return self.triangle.mod_triangle(2)
+        return list(self.iter_parity_pattern())
+
+    def iter_parity_pattern(self) -> Iterator[list[int]]:
+        """Yield the parity pattern of each row in the triangle, one row at a time."""
+        for row in self.iter_rows():
+            yield [1 if val % 2 == 1 else 0 for val in row]
 
     def mod_triangle(self, k: int) -> list[list[int]]:
         """Calculate the triangle with entries modulo k."""
-        return [[val % k for val in row] for row in self.triangle]
+        if isinstance(self.triangle, PackedRows):
+            return self.triangle.mod_triangle(k)
+        return [[val % k for val in python_row(row)] for row in self.iter_rows()]
 
     def center(self) -> list[int]:
         """Return the middle entries for rows with an odd number of elements."""
-        middle_entries = []
-        for row in self.triangle:
-            if len(row) % 2 == 1:
-                # Row has an odd number of elements, so get the middle element
-                middle_index = len(row) // 2
-                middle_entries.append(row[middle_index])
-        return middle_entries
+        return list(self.iter_center())
+
+    def iter_center(self) -> Iterator[int]:
+        """Yield the middle entries for rows with an odd number of elements, one row at a time."""
+        # Row i has i + 1 elements, so rows with an odd number of elements are the even-indexed ones
+        if self._own_rows and (type(self).entry is not Triangle.entry or type(self).line is not Triangle.line):
+            # Closed-form entries skip the rows in between
+            yield from self.line(0, 0, 2, 1, (self.n + 1) // 2)
+            return
+        for i, row in enumerate(self.iter_rows()):
+            if i % 2 == 0:
+                yield row[i // 2]
 
     def hexagonal_centers(self) -> list[list[int]]:
         """Extract hexagonal centers of triangle."""
-        ret = []
-        for i in range(2, self.n, 2):
-            centers = []
-            for j in range(1, i, 2):
-                centers.append(self.triangle[i][j])
-            ret.append(centers)
-        return ret
+        # Row i holds the centers at columns 1, 3, ..., i - 1
+        return [self.line(i, 1, 0, 2, i // 2) for i in range(2, self.n, 2)]
 
     def is_symmetric(self) -> bool:
         """Check if the triangle is symmetric."""
         for row in self.triangle:
+            row = list(row)
             if row != row[::-1]:
                 return False
         return True
@@ -133,41 +429,61 @@ class Triangle:
         Returns:
             list[int]: A list of elements from the specified diagonal.
         """
-        diagonal = []
-
         if direction == "right":
             # Extract the right diagonal (down-right from left edge)
-            for i in range(diagonal_index, len(self.triangle)):
-                diagonal.append(self.triangle[i][diagonal_index])
-        elif direction == "left":
+            return self.line(diagonal_index, diagonal_index, 1, 0, self.n - diagonal_index)
+        if direction == "left":
             # Extract the left diagonal (down-left from right edge)
-            for i in range(len(self.triangle) - diagonal_index):
-                diagonal.append(self.triangle[i + diagonal_index][i])
-        else:
-            raise ValueError("Direction must be either 'left' or 'right'.")
-
-        return diagonal
+            return self.line(diagonal_index, 0, 1, 1, self.n - diagonal_index)
+        raise ValueError("Direction must be either 'left' or 'right'.")
 
     def format_triangle(self, highlight_diag=None):
         """Format the triangle for printing with options to highlight specific diagonals or shapes."""
+        buffer = StringIO()
+        self.write_triangle(buffer, highlight_diag)
+        return buffer.getvalue()
+
+    def write_triangle(self, file: TextIO, highlight_diag: int = None, chunk_rows: int = 256) -> None:
+        """Write the triangle formatted as by `format_triangle` to a file-like object, streaming the rows.
+
+        Args:
+            file (TextIO): The file-like object to write to.
+            highlight_diag (int): If given, entries on the left and right diagonals with this index are bold.
+            chunk_rows (int): The number of formatted rows joined into each write.
+        """
         def is_in_diagonal(row, col, diag):
             return diag in (row - col, col - row)
 
         def highlight_element(num):
             return f"\033[1m{num}\033[0m"  # Bold text (ANSI escape code)
 
-        max_width = len(str(max(max(row) for row in self.triangle)))
+        if self.n == 0:
+            return
+        max_width = self._entry_width()
         spacing = 3  # Adjust for readability
-        last_row_width = len(self.triangle[-1]) * (max_width + spacing) - spacing
-
-        ret = ""
-        for i, row in enumerate(self.triangle):
-            formatted_nums = []
-            for j, num in enumerate(row):
-                if highlight_diag is not None and is_in_diagonal(i, j, highlight_diag):
-                    formatted_nums.append(f"{highlight_element(num):^{max_width}}")
-                else:
-                    formatted_nums.append(f"{num:^{max_width}}")
+        # The last row holds n entries, which is known without generating it
+        last_row_width = self.n * (max_width + spacing) - spacing
+
+        lines = []
+        for i, row in enumerate(self.iter_rows()):
+            formatted_nums = [
+                f"{highlight_element(num):^{max_width}}"
+                if highlight_diag is not None and is_in_diagonal(i, j, highlight_diag) else f"{num:^{max_width}}"
+                for j, num in enumerate(row)
+            ]
             left_padding = (last_row_width - len(row) * (max_width + spacing) + spacing) // 2
-            ret += " " * left_padding + (" " * spacing).join(formatted_nums) + "\n"
-        return ret
+            lines.append(" " * left_padding + (" " * spacing).join(formatted_nums) + "\n")
+            if len(lines) == chunk_rows:
+                file.write("".join(lines))
+                lines = []
+        file.write("".join(lines))
+
+    def _entry_width(self) -> int:
+        """Return the printed width of the largest entry, cached until the rows change."""
+        if self._max_width is None:
+            if isinstance(self.triangle, PackedRows):
+                largest = self.triangle.values.max()
+            else:
+                largest = max(max(row) for row in self.iter_rows())
+            self._max_width = len(str(largest))
+        return self._max_width
@@ -1,163 +1,363 @@
 """Implementations of different triangular arrays."""
-from math import comb
+from math import comb, prod
+from typing import Callable, Iterator
+import numpy as np
+
 from triforce.sequences import (
+    FIBONACCI,
+    FIBONACCI_CACHE,
+    LUCAS,
     lucas,
     fibonacci,
+    fibonacci_pair,
     wythoff_term,
 )
 from triforce.triangle import Triangle
 
 
+def _modular_pascal_row(previous: np.ndarray, edge: int, modulus: int) -> np.ndarray:
+    """Return [edge, previous[0] + previous[1], ..., edge] modulo `modulus` in the dtype of `previous`."""
+    row = np.empty(len(previous) + 1, dtype=previous.dtype)
+    row[0] = row[-1] = edge % modulus
+    inner = row[1:-1]
+    np.add(previous[:-1], previous[1:], out=inner)
+    # Both summands are residues, so a single subtraction reduces the sum
+    inner[inner >= modulus] -= modulus
+    return row
+
+
+def _modular_bell_row(previous: np.ndarray, modulus: int) -> np.ndarray:
+    """Return the Bell triangle row following `previous` modulo `modulus` in the dtype of `previous`."""
+    # Row entries are the last entry of the previous row plus the running sums of the previous row
+    dtype = np.int64 if (len(previous) + 1) * modulus < 2**63 else object
+    sums = np.cumsum(previous, dtype=dtype)
+    row = np.empty(len(previous) + 1, dtype=previous.dtype)
+    row[0] = previous[-1]
+    row[1:] = (sums + int(previous[-1])) % modulus
+    return row
+
+
+def _factorial_ratio(a: int, b: int) -> tuple[int, int]:
+    """Return a! / b! as a numerator and a denominator."""
+    if a >= b:
+        return prod(range(b + 1, a + 1)), 1
+    return 1, prod(range(a + 1, b + 1))
+
+
+def _ratio_line(
+    start: int,
+    i: int,
+    j: int,
+    steps: tuple[int, int, int],
+    ratio: Callable[[int, int, int, int], tuple[int, int]],
+) -> list[int]:
+    """Return the entries along a line from the entry `start` at (i, j), where steps = (row_step, col_step, count).
+
+    `ratio(i, j, next_i, next_j)` returns the numerator and denominator of the ratio of consecutive entries, so
+    each entry costs O(|row_step| + |col_step|) big-integer operations.
+    """
+    row_step, col_step, count = steps
+    values = [start]
+    for _ in range(count - 1):
+        numerator, denominator = ratio(i, j, i + row_step, j + col_step)
+        values.append(values[-1] * numerator // denominator)
+        i, j = i + row_step, j + col_step
+    return values
+
+
+def _fibonacci_progression(start: int, step: int, count: int) -> list[int]:
+    """Return F(start), F(start + step), ..., F(start + (count - 1) step) in O(log start + |step| count) operations."""
+    low = min(start, start + (count - 1) * step)
+    a, b = fibonacci_pair(low)
+    terms = [a]
+    for _ in range(abs(step) * (count - 1)):
+        a, b = b, a + b
+        terms.append(a)
+    return terms * count if step == 0 else terms[::step]
+
+
 class BellTriangle(Triangle):
     """Defines the Bell Triangle: https://en.wikipedia.org/wiki/Bell_triangle"""
+    modular_rows = True
 
-    def generate_triangle(self) -> list[list[int]]:
-        """Generate Bell's triangle up to row n."""
-        triangle = [[1]]  # Initialize with the first row
+    def next_row(self, i: int, previous: list[int] | None) -> list[int]:
+        """Generate row i of Bell's triangle from row i - 1."""
+        if i == 0:
+            return [1] if self.modulus is None else self._modular_row([1])  # Initialize with the first row
+        if self.modulus is not None:
+            return _modular_bell_row(previous, self.modulus)
 
-        for i in range(1, self.n):
-            row = [triangle[i-1][-1]]  # First element is the last element of the previous row
-            for j in range(1, i + 1):
-                row.append(row[-1] + triangle[i-1][j-1])
-            triangle.append(row)
-        return triangle
+        row = [previous[-1]]  # First element is the last element of the previous row
+        for j in range(1, i + 1):
+            row.append(row[-1] + previous[j-1])
+        return row
 
 
 class CatalanTriangle(Triangle):
     """Defines the Catalan Triangle using the combinatorial formula."""
+    closed_form_rows = True
+
+    def next_row(self, i: int, previous: list[int] | None) -> list[int]:
+        """Generate row i of the Catalan Triangle, using C(i, k+1) = C(i, k) (i-k)(i+k+1) / ((i-k+1)(k+1))."""
+        row = [1]
+        for k in range(i):
+            row.append(row[-1] * (i - k) * (i + k + 1) // ((i - k + 1) * (k + 1)))
+        return row
+
+    def entry(self, i: int, j: int) -> int:
+        """Return the entry in row i and column j."""
+        if not self._own_rows:
+            return super().entry(i, j)
+        self._check_entry_index(i, j)
+        # General formula: C(n, k) = (n-k+1)/(n+1) * binom(n+k, k)
+        return (i - j + 1) * comb(i + j, j) // (i + 1)
+
+    def line(self, i: int, j: int, row_step: int, col_step: int, count: int) -> list[int]:
+        """Return the entries along a line, each from the previous one by the ratio of the closed form."""
+        if not self._own_rows:
+            return super().line(i, j, row_step, col_step, count)
+        if count <= 0:
+            return []
+        self._check_entry_index(i + (count - 1) * row_step, j + (count - 1) * col_step)
 
-    def generate_triangle(self) -> list[list[int]]:
-        """Generate the Catalan Triangle up to row n."""
-        triangle = []
-
-        for n in range(self.n):
-            row = []
-            for k in range(n + 1):
-                # General formula: C(n, k) = (n-k+1)/(n+1) * binom(n+k, k)
-                catalan_value = (n - k + 1) * comb(n + k, k) // (n + 1)
-                row.append(catalan_value)
-            triangle.append(row)
+        def ratio(i, j, next_i, next_j):
+            # C(i, j) = (i-j+1) (i+j)! / (j! (i+1)!)
+            numerators, denominators = zip(
+                _factorial_ratio(next_i + next_j, i + j),
+                _factorial_ratio(j, next_j),
+                _factorial_ratio(i + 1, next_i + 1),
+            )
+            return (next_i - next_j + 1) * prod(numerators), (i - j + 1) * prod(denominators)
 
-        return triangle
+        return _ratio_line(self.entry(i, j), i, j, (row_step, col_step, count), ratio)
 
 
 class FloydsTriangle(Triangle):
     """Defines Floyd's Triangle: https://en.wikipedia.org/wiki/Floyd%27s_triangle"""
+    closed_form_rows = True
 
-    def generate_triangle(self) -> list[list[int]]:
-        """Generate Floyd's triangle up to row n."""
-        triangle = []
-        num = 1  # Start counting from 1
+    def next_row(self, i: int, previous: list[int] | None) -> list[int]:
+        """Generate row i of Floyd's triangle."""
+        start = i * (i + 1) // 2 + 1  # Rows before row i hold i(i+1)/2 numbers, counting from 1
+        return list(range(start, start + i + 1))
 
-        for i in range(1, self.n + 1):
-            row = []
-            for _ in range(i):
-                row.append(num)
-                num += 1
-            triangle.append(row)
-        return triangle
+    def entry(self, i: int, j: int) -> int:
+        """Return the entry in row i and column j."""
+        if not self._own_rows:
+            return super().entry(i, j)
+        self._check_entry_index(i, j)
+        return i * (i + 1) // 2 + j + 1
 
 
 class HosoyaTriangle(Triangle):
     """Defines the Hosoya Triangle: https://en.wikipedia.org/wiki/Hosoya%27s_triangle"""
-
-    def generate_triangle(self) -> list[list[int]]:
-        """Generate the Hosoya triangle up to row n."""
-        triangle = []
-        for i in range(self.n):
-            row = []
-            for j in range(i + 1):
-                entry = fibonacci(j + 1) * fibonacci(i - j + 1)
-                row.append(entry)
-            triangle.append(row)
-        return triangle
+    closed_form_rows = True
+
+    def next_row(self, i: int, previous: list[int] | None) -> list[int]:
+        """Generate row i of the Hosoya triangle."""
+        fib = FIBONACCI_CACHE.prefix(i + 2)
+        return [fib[j + 1] * fib[i - j + 1] for j in range(i + 1)]
+
+    def entry(self, i: int, j: int) -> int:
+        """Return the entry in row i and column j."""
+        if not self._own_rows:
+            return super().entry(i, j)
+        self._check_entry_index(i, j)
+        return fibonacci(j + 1) * fibonacci(i - j + 1)
+
+    def line(self, i: int, j: int, row_step: int, col_step: int, count: int) -> list[int]:
+        """Return the entries along a line from the two Fibonacci progressions F(j + 1) and F(i - j + 1) along it."""
+        if not self._own_rows:
+            return super().line(i, j, row_step, col_step, count)
+        if count <= 0:
+            return []
+        self._check_entry_index(i, j)
+        self._check_entry_index(i + (count - 1) * row_step, j + (count - 1) * col_step)
+        left = _fibonacci_progression(j + 1, col_step, count)
+        right = _fibonacci_progression(i - j + 1, row_step - col_step, count)
+        return [a * b for a, b in zip(left, right)]
 
 
 class PascalTriangle(Triangle):
     """Defines Pascal's Triangle: https://en.wikipedia.org/wiki/Pascal%27s_triangle"""
+    closed_form_rows = True
+    modular_rows = True
 
-    def generate_triangle(self) -> list[list[int]]:
-        """Generate Pascal's triangle up to row n."""
-        triangle = [[1]]
-        for i in range(1, self.n):
+    def next_row(self, i: int, previous: list[int] | None) -> list[int]:
+        """Generate row i of Pascal's triangle, by addition when row i - 1 is available."""
+        if previous is None:
+            # Multiplicative formula: C(i, j) = C(i, j-1) * (i-j+1) / j
             row = [1]
-            for j in range(1, i):
-                row.append(triangle[i-1][j-1] + triangle[i-1][j])
-            row.append(1)
-            triangle.append(row)
-        return triangle
+            for j in range(1, i + 1):
+                row.append(row[-1] * (i - j + 1) // j)
+            return row if self.modulus is None else self._modular_row(row)
+        if self.modulus is not None:
+            return _modular_pascal_row(previous, 1, self.modulus)
+
+        row = [1]
+        for j in range(1, i):
+            row.append(previous[j-1] + previous[j])
+        row.append(1)
+        return row
+
+    def entry(self, i: int, j: int) -> int:
+        """Return the entry in row i and column j."""
+        if not self._own_rows:
+            return super().entry(i, j)
+        self._check_entry_index(i, j)
+        return comb(i, j) if self.modulus is None else comb(i, j) % self.modulus
+
+    def line(self, i: int, j: int, row_step: int, col_step: int, count: int) -> list[int]:
+        """Return the entries along a line, each from the previous one by a ratio of factorials."""
+        if not self._own_rows:
+            return super().line(i, j, row_step, col_step, count)
+        if count <= 0:
+            return []
+        self._check_entry_index(i + (count - 1) * row_step, j + (count - 1) * col_step)
+
+        def ratio(i, j, next_i, next_j):
+            # C(i, j) = i! / (j! (i-j)!)
+            numerators, denominators = zip(
+                _factorial_ratio(next_i, i), _factorial_ratio(j, next_j), _factorial_ratio(i - j, next_i - next_j)
+            )
+            return prod(numerators), prod(denominators)
+
+        self._check_entry_index(i, j)
+        values = _ratio_line(comb(i, j), i, j, (row_step, col_step, count), ratio)
+        return values if self.modulus is None else [value % self.modulus for value in values]
+
+    def is_divisible(self, i: int, j: int, p: int) -> bool:
+        """Check whether the prime p divides C(i, j) without computing the binomial coefficient."""
+        self._check_entry_index(i, j)
+        self._check_prime(p)
+        # Kummer's theorem: p divides C(i, j) exactly when some base-p digit of j exceeds that digit of i
+        while j:
+            if j % p > i % p:
+                return True
+            i //= p
+            j //= p
+        return False
+
+    @staticmethod
+    def _check_prime(p: int) -> None:
+        """Raise a ValueError if p is below 2, for which the base-p digits of Kummer's theorem are undefined."""
+        if p < 2:
+            raise ValueError("The divisor must be a prime.")
+
+    def divisibility_block(self, start: int, stop: int, p: int) -> np.ndarray:
+        """Return a boolean bitmap of which C(i, j) the prime p divides for rows start through stop - 1.
+
+        Entry [r, j] of the (stop - start) x stop bitmap corresponds to C(start + r, j). Positions to the
+        right of the triangle (j > start + r) are False.
+        """
+        if not 0 <= start <= stop <= self.n:
+            raise IndexError(f"Rows {start} to {stop} are out of range for a triangle with {self.n} rows.")
+        self._check_prime(p)
+        rows = np.arange(start, stop, dtype=np.int64)[:, None]
+        cols = np.arange(stop, dtype=np.int64)[None, :]
+        inside = cols <= rows
+        if p == 2:
+            # Adding j and i - j carries in binary exactly when they share a set bit
+            return ((cols & (rows - cols)) != 0) & inside
+
+        divisible = np.zeros((stop - start, stop), dtype=bool)
+        i, j = np.broadcast_arrays(rows, cols)
+        i, j = i.copy(), j.copy()
+        while j.any():
+            divisible |= j % p > i % p
+            i //= p
+            j //= p
+        return divisible & inside
+
+    def iter_parity_pattern(self) -> Iterator[list[int]]:
+        """Yield the parity pattern of each row, following Pascal's rule modulo 2 without big integers."""
+        if self.modulus is not None or not self._own_rows:
+            yield from super().iter_parity_pattern()
+            return
+        for odd in self.iter_odd_masks():
+            yield odd.view(np.uint8).tolist()
+
+    def iter_odd_masks(self) -> Iterator[np.ndarray]:
+        """Yield, for each row, a read-only boolean array marking its odd entries.
+
+        Generated rows follow Pascal's rule modulo 2, one vectorized pass per row, so no binomial coefficient is
+        computed. `divisibility_block` answers the same question for an arbitrary block of rows, but streaming
+        row by row this recurrence is several times faster. Other rows are tested entry by entry.
+        """
+        if self.modulus is not None or not self._own_rows:
+            for row in super().iter_parity_pattern():
+                yield np.array(row, dtype=bool)
+            return
+        previous = np.ones(1, dtype=bool)
+        for i in range(self.n):
+            odd = np.empty(i + 1, dtype=bool)
+            odd[0] = odd[-1] = True
+            if i > 1:
+                # An entry is odd exactly when one of its two parents is
+                np.not_equal(previous[:-1], previous[1:], out=odd[1:-1])
+            odd.flags.writeable = False
+            previous = odd
+            yield odd
+
 
 class FibonacciPascalTriangle(Triangle):
     """Defines the Fibonacci-Pascal Triangle: Fibonacci Quart. 60 (2022), no. 5, 372–383,"""
+    modular_rows = True
 
-    def generate_triangle(self) -> list[list[int]]:
-        """Generate the Fibonacci-Pascal Triangle up to n rows (iterative version)."""
-        if self.n == 0:
-            return []
-
+    def next_row(self, i: int, previous: list[int] | None) -> list[int]:
+        """Generate row i of the Fibonacci-Pascal Triangle from row i - 1."""
         # Initialize the triangle with the first row
-        triangle = [[1]]
-
-        # Iteratively generate the Fibonacci-Pascal Triangle for rows 2 to n
-        for row_num in range(2, self.n + 1):
-            new_row = [fibonacci(row_num)]  # Start the new row with F(n)
+        if i == 0:
+            return [1] if self.modulus is None else self._modular_row([1])
+        if self.modulus is not None:
+            return _modular_pascal_row(previous, FIBONACCI.term(i + 1, self.modulus), self.modulus)
 
-            # Get the last row from the triangle
-            last_row = triangle[-1]
+        new_row = [fibonacci(i + 1)]  # Start the new row with F(n)
 
-            # Generate the inner elements of the row by summing adjacent elements in the last row
-            for i in range(len(last_row) - 1):
-                new_row.append(last_row[i] + last_row[i + 1])
+        # Generate the inner elements of the row by summing adjacent elements in the last row
+        for j in range(len(previous) - 1):
+            new_row.append(previous[j] + previous[j + 1])
 
-            # Append the Fibonacci value at the end of the row
-            new_row.append(fibonacci(row_num))
-
-            # Add the new row to the triangle
-            triangle.append(new_row)
-
-        return triangle
+        # Append the Fibonacci value at the end of the row
+        new_row.append(fibonacci(i + 1))
+        return new_row
 
 
 class LucasPascalTriangle(Triangle):
     """Defines the Lucas-Pascal Triangle"""
+    modular_rows = True
 
-    def generate_triangle(self) -> list[list[int]]:
-        """Generate the Lucas-Pascal Triangle up to n rows (iterative version)."""
-        if self.n == 0:
-            return []
-
+    def next_row(self, i: int, previous: list[int] | None) -> list[int]:
+        """Generate row i of the Lucas-Pascal Triangle from row i - 1."""
         # Initialize the triangle with the first row
-        triangle = [[1]]
-
-        # Iteratively generate the Lucas-Pascal Triangle for rows 2 to n
-        for row_num in range(2, self.n + 1):
-            new_row = [lucas(row_num)]  # Start the new row with F(n)
-
-            # Get the last row from the triangle
-            last_row = triangle[-1]
+        if i == 0:
+            return [1] if self.modulus is None else self._modular_row([1])
+        if self.modulus is not None:
+            return _modular_pascal_row(previous, LUCAS.term(i + 1, self.modulus), self.modulus)
 
-            # Generate the inner elements of the row by summing adjacent elements in the last row
-            for i in range(len(last_row) - 1):
-                new_row.append(last_row[i] + last_row[i + 1])
+        new_row = [lucas(i + 1)]  # Start the new row with L(n)
 
-            # Append the Lucas value at the end of the row
-            new_row.append(lucas(row_num))
+        # Generate the inner elements of the row by summing adjacent elements in the last row
+        for j in range(len(previous) - 1):
+            new_row.append(previous[j] + previous[j + 1])
 
-            # Add the new row to the triangle
-            triangle.append(new_row)
-
-        return triangle
+        # Append the Lucas value at the end of the row
+        new_row.append(lucas(i + 1))
+        return new_row
 
 
 class WythoffTriangle(Triangle):
     """Defines the Wythoff Triangle based on the top-left to bottom-right reading of the Wythoff Array."""
-
-    def generate_triangle(self) -> list[list[int]]:
-        """Generate the Wythoff triangle up to row n."""
-        triangle = []
-        for i in range(1, self.n + 1):
-            row = []
-            for j in range(1, i + 1):
-                row.append(wythoff_term(j, i - j + 1))
-            triangle.append(row[::-1])
-        return triangle
+    closed_form_rows = True
+
+    def next_row(self, i: int, previous: list[int] | None) -> list[int]:
+        """Generate row i of the Wythoff triangle."""
+        return [wythoff_term(i - j + 1, j + 1) for j in range(i + 1)]
+
+    def entry(self, i: int, j: int) -> int:
+        """Return the entry in row i and column j."""
+        if not self._own_rows:
+            return super().entry(i, j)
+        self._check_entry_index(i, j)
+        # Rows read the anti-diagonals of the Wythoff array from bottom-left to top-right
+        return wythoff_term(i - j + 1, j + 1)